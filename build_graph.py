@@ -1,56 +1,209 @@
 import sys
 import os
+import asyncio
+import hashlib
+import importlib.util
+import json
+import shutil
+import subprocess
+import tempfile
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.agent.graph import build_graph
+AGENT_SRC_DIR = Path(__file__).parent / "src" / "agent"
+GRAPH_CACHE_FILE = Path(".graph_cache.json")
 
-def visualize():
+
+def _agent_sources_stamp() -> list:
+    """Fingerprint of the agent package: [file name, mtime] for every module."""
+    return sorted(
+        [p.name, p.stat().st_mtime_ns] for p in AGENT_SRC_DIR.glob("*.py")
+    )
+
+
+def _load_mermaid_source() -> str:
+    """
+    Return the Mermaid definition of the agent graph.
+
+    The source is cached in .graph_cache.json keyed by the mtimes of the files
+    under src/agent/, so an unchanged tree never re-imports the agent module.
+    """
+    stamp = _agent_sources_stamp()
+
+    if GRAPH_CACHE_FILE.exists():
+        try:
+            with open(GRAPH_CACHE_FILE, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("stamp") == stamp:
+                print("♻️  Agent graph unchanged, using cached topology")
+                return cached["mermaid"]
+        except Exception:
+            pass
+
+    from src.agent.graph import build_graph
+
+    graph = build_graph()
+    drawable = graph.get_graph()
+    mermaid_source = drawable.draw_mermaid()
+
+    try:
+        with open(GRAPH_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump({
+                "stamp": stamp,
+                "nodes": list(drawable.nodes),
+                "edges": [[e.source, e.target, e.conditional] for e in drawable.edges],
+                "mermaid": mermaid_source
+            }, f)
+    except Exception:
+        pass
+
+    return mermaid_source
+
+
+def _publish_png(keyed_png: Path, output_png: Path):
+    """Copy the keyed render to agent_flow.png, which is tracked, so it stays a regular file"""
+    if output_png.is_symlink():
+        # Left behind by older versions of this script
+        output_png.unlink()
+    _write_if_changed(output_png, keyed_png.read_bytes())
+
+
+def _open_image(path: Path) -> bool:
+    """Open an image in the default viewer without blocking or going through a shell"""
+    if os.name == 'nt':
+        os.startfile(path)
+        return True
+
+    opener = shutil.which("open" if sys.platform == 'darwin' else "xdg-open")
+    if not opener:
+        return False
+    subprocess.Popen(
+        [opener, str(path)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    return True
+
+
+def _content_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _write_if_changed(path: Path, data: bytes) -> bool:
+    """Write bytes to path unless it already holds identical content"""
+    if path.is_file() and _content_digest(path.read_bytes()) == _content_digest(data):
+        return False
+    path.write_bytes(data)
+    return True
+
+
+def _write_mermaid(output_mmd: Path, mermaid_source: str) -> bool:
+    """Write the Mermaid definition, returning False when the file was already current"""
+    return _write_if_changed(output_mmd, mermaid_source.encode("utf-8"))
+
+
+def _render_png(mermaid_source: str, key: str) -> Path:
+    """
+    Render the PNG for a given graph key, reusing the keyed file when present.
+
+    Rendering prefers local tools so no network round-trip is needed:
+    the mermaid-cli `mmdc` binary, then Pyppeteer (headless Chromium), and
+    only falls back to the mermaid.ink API when neither is installed or
+    both fail.
+    """
+    keyed_png = Path(f"agent_flow.{key}.png")
+    if keyed_png.exists():
+        return keyed_png
+
+    mmdc = shutil.which("mmdc")
+    if mmdc:
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                source_file = Path(tmp_dir) / "agent_flow.mmd"
+                source_file.write_text(mermaid_source, encoding="utf-8")
+                subprocess.run(
+                    [mmdc, "-i", str(source_file), "-o", str(keyed_png)],
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE
+                )
+            return keyed_png
+        except (OSError, subprocess.CalledProcessError) as e:
+            keyed_png.unlink(missing_ok=True)
+            print(f"⚠️  mmdc failed ({e}), trying the next renderer")
+
+    from langchain_core.runnables.graph_mermaid import draw_mermaid_png
+    from langchain_core.runnables.graph import MermaidDrawMethod
+
+    # Pyppeteer can fail even when installed (no Chromium, or its launch() refusing
+    # to install signal handlers off the main thread); mermaid.ink is the last resort
+    draw_methods = [MermaidDrawMethod.API]
+    if importlib.util.find_spec("pyppeteer"):
+        draw_methods.insert(0, MermaidDrawMethod.PYPPETEER)
+    for draw_method in draw_methods:
+        try:
+            png_data = draw_mermaid_png(mermaid_syntax=mermaid_source, draw_method=draw_method)
+            break
+        except Exception as e:
+            if draw_method is MermaidDrawMethod.API:
+                raise
+            print(f"⚠️  Pyppeteer rendering failed ({e}), falling back to mermaid.ink")
+    with open(keyed_png, "wb") as f:
+        f.write(png_data)
+    return keyed_png
+
+
+async def visualize():
     print("🎨 Generating Agent Workflow Visualization...")
     print("-" * 50)
-    
+
     try:
-        graph = build_graph()
-        
-        mermaid_source = graph.get_graph().draw_mermaid()
-        
+        mermaid_source = _load_mermaid_source()
+        key = hashlib.sha1(mermaid_source.encode()).hexdigest()
+
         output_mmd = Path("agent_flow.mmd")
-        with open(output_mmd, "w", encoding="utf-8") as f:
-            f.write(mermaid_source)
-            
-        print(f"✅ Mermaid Definition saved to: {output_mmd.name}")
+        output_png = Path("agent_flow.png")
+
+        # Overlap the mermaid.ink round-trip with the local .mmd write
+        mmd_result, png_result = await asyncio.gather(
+            asyncio.to_thread(_write_mermaid, output_mmd, mermaid_source),
+            asyncio.to_thread(_render_png, mermaid_source, key),
+            return_exceptions=True
+        )
+
+        if isinstance(mmd_result, Exception):
+            print(f"❌ Could not write {output_mmd.name}: {mmd_result}")
+        elif mmd_result:
+            print(f"✅ Mermaid Definition saved to: {output_mmd.name}")
+        else:
+            print(f"✅ Mermaid Definition up to date: {output_mmd.name}")
         print("   👉 You can view/edit this at https://mermaid.live")
 
         print("\n🖼️  Attempting to generate PNG image...")
         try:
-            png_data = graph.get_graph().draw_mermaid_png()
-            output_png = Path("agent_flow.png")
-            with open(output_png, "wb") as f:
-                f.write(png_data)
+            if isinstance(png_result, Exception):
+                raise png_result
+            _publish_png(png_result, output_png)
             print(f"✅ Graph Image saved to: {output_png.name}")
-            
+
             try:
-                if os.name == 'nt':  
-                    os.startfile(output_png)
-                elif sys.platform == 'darwin':  
-                    os.system(f"open {output_png}")
-                else:  # Linux
-                    os.system(f"xdg-open {output_png}")
-                print("   (Opened image in default viewer)")
+                if _open_image(output_png):
+                    print("   (Opened image in default viewer)")
             except Exception:
-                pass 
-                
+                pass
+
         except Exception as e:
             print(f"⚠️  Could not generate PNG automatically.")
             print(f"   Reason: {e}")
-            print("   (This usually means 'graphviz' is not installed on your system)")
+            print("   (Install mermaid-cli ('mmdc') or pyppeteer to render locally without network access)")
             print("   Don't worry! You can still use the 'agent_flow.mmd' file generated above.")
 
     except Exception as e:
         print(f"❌ Error building graph: {e}")
-    
+
     print("-" * 50)
 
 if __name__ == "__main__":
-    visualize()
\ No newline at end of file
+    asyncio.run(visualize())
@@ -4,6 +4,9 @@ Debug script to find exactly where email_scanner_node fails
 
 import os
 import sys
+import inspect
+import re
+import traceback
 from datetime import datetime, timedelta
 
 # Add detailed logging
@@ -14,12 +17,39 @@ print("="*70)
 print("DEBUGGING EMAIL SCANNER NODE")
 print("="*70)
 
+# Patterns for inspecting email_scanner_node's source (Test 4)
+COMPLETION_RE = re.compile(
+    r'_complete_step\(\s*state\s*,\s*"email_scanner"\s*\)'
+    r'|completed_steps"?\]?\.append\(\s*"email_scanner"\s*\)'
+)
+OLD_COMPLETION_RE = re.compile(r'completed_steps"?\]?\.append\(\s*"email_scanning"\s*\)')
+SUCCESS_BLOCK_COMPLETION_RE = re.compile(
+    r'if\s+result\.get\(\s*"success"\s*\)[^\n]*\n'
+    r'(?:[^\n]*\n){0,15}?[^\n]*(?:completed_steps\.append|_complete_step\()'
+)
+
+# Import the agent once; each test re-raises the error if this failed
+try:
+    from src.agent.tools import scan_emails
+    from src.agent.state import create_initial_state
+    from src.agent.nodes import email_scanner_node, should_continue
+    agent_import_error = None
+except Exception as e:
+    agent_import_error = e
+    print(f"\n❌ Could not import the agent package: {e}")
+    traceback.print_exc()
+
+
+def require_agent():
+    if agent_import_error:
+        raise agent_import_error
+
 # Test 1: Check if the tool returns success
 print("\n1. Testing scan_emails tool directly...")
 print("-"*70)
 
 try:
-    from src.agent.tools import scan_emails
+    require_agent()
     
     date_from = (datetime.now() - timedelta(days=30)).isoformat()[:10]
     date_to = datetime.now().isoformat()[:10]
@@ -53,7 +83,6 @@ try:
         
 except Exception as e:
     print(f"❌ Exception during tool call: {e}")
-    import traceback
     traceback.print_exc()
 
 # Test 2: Simulate what the node does
@@ -62,8 +91,7 @@ print("2. Simulating email_scanner_node execution...")
 print("-"*70)
 
 try:
-    from src.agent.state import create_initial_state
-    from src.agent.nodes import email_scanner_node
+    require_agent()
     
     # Create test state
     state = create_initial_state("Scan my email for bills", "test_user")
@@ -104,12 +132,10 @@ try:
                 
     except Exception as e:
         print(f"\n❌ Exception inside email_scanner_node: {e}")
-        import traceback
         traceback.print_exc()
         
 except Exception as e:
     print(f"❌ Failed to test node: {e}")
-    import traceback
     traceback.print_exc()
 
 # Test 3: Check credentials
@@ -132,7 +158,6 @@ else:
 
 if os.path.exists(token_path):
     print(f"✅ Token file exists")
-    import os.path
     size = os.path.getsize(token_path)
     print(f"   Size: {size} bytes")
 else:
@@ -144,30 +169,22 @@ print("4. Checking email_scanner_node code...")
 print("-"*70)
 
 try:
-    import inspect
-    from src.agent.nodes import email_scanner_node
+    require_agent()
     
     source = inspect.getsource(email_scanner_node)
     
     # Check if it has the correct completion line
-    if 'state["completed_steps"].append("email_scanner")' in source:
-        print("✅ Node has correct completion line: append('email_scanner')")
-    elif 'state["completed_steps"].append("email_scanning")' in source:
+    if COMPLETION_RE.search(source):
+        print("✅ Node has correct completion line for 'email_scanner'")
+    elif OLD_COMPLETION_RE.search(source):
         print("❌ Node has OLD completion line: append('email_scanning')")
         print("   You need to apply the nodes_fixed.py file!")
     else:
         print("⚠️  Cannot find completion line in node code")
         
     # Check if completion is inside if success block
-    lines = source.split('\n')
-    for i, line in enumerate(lines):
-        if 'if result.get("success")' in line:
-            # Check next few lines
-            for j in range(i, min(i+15, len(lines))):
-                if 'completed_steps.append' in lines[j]:
-                    print(f"✅ Completion line is inside success block (good)")
-                    break
-            break
+    if SUCCESS_BLOCK_COMPLETION_RE.search(source):
+        print(f"✅ Completion line is inside success block (good)")
             
 except Exception as e:
     print(f"⚠️  Could not inspect node code: {e}")
@@ -178,12 +195,13 @@ print("5. Testing should_continue logic...")
 print("-"*70)
 
 try:
-    from src.agent.nodes import should_continue
+    require_agent()
     
     # Test scenario 1: email_scanner not completed
     test_state_1 = {
         "plan": ["email_scanner", "pdf_processor", "data_extractor"],
         "completed_steps": [],  # Nothing completed yet
+        "plan_cursor": 0,
         "errors": [],
         "retry_count": 0,
         "max_retries": 3
@@ -201,6 +219,7 @@ try:
     test_state_2 = {
         "plan": ["email_scanner", "pdf_processor", "data_extractor"],
         "completed_steps": ["email_scanner"],  # email_scanner done
+        "plan_cursor": 1,
         "errors": [],
         "retry_count": 0,
         "max_retries": 3
@@ -218,7 +237,6 @@ try:
         
 except Exception as e:
     print(f"❌ Error testing should_continue: {e}")
-    import traceback
     traceback.print_exc()
 
 print("\n" + "="*70)
@@ -229,7 +247,7 @@ print("\n📊 SUMMARY:")
 print("-"*70)
 print("The infinite loop happens when:")
 print("1. email_scanner_node runs but doesn't mark itself as completed")
-print("2. should_continue() sees 'email_scanner' not in completed_steps")
+print("2. should_continue() sees plan_cursor still pointing at 'email_scanner'")
 print("3. Returns 'email_scanner' again")
 print("4. Loop repeats until recursion limit")
 print("\nMost likely causes:")
@@ -15,6 +15,20 @@ print("="*70)
 print("CONFIGURATION DIAGNOSTIC TOOL")
 print("="*70)
 
+# Scan each directory we care about once instead of stat()-ing every path
+_dir_listings = {}
+
+def path_exists(path: Path) -> bool:
+    """Check a path against a cached os.scandir listing of its parent directory"""
+    parent = path.parent
+    if parent not in _dir_listings:
+        try:
+            with os.scandir(parent) as entries:
+                _dir_listings[parent] = {entry.name for entry in entries}
+        except OSError:
+            _dir_listings[parent] = set()
+    return path.name in _dir_listings[parent]
+
 # Check 1: Python environment
 print("\n1. Python Environment:")
 print(f"   Python version: {sys.version.split()[0]}")
@@ -29,7 +43,7 @@ config_paths = [
 ]
 
 for path in config_paths:
-    exists = "✅" if path.exists() else "❌"
+    exists = "✅" if path_exists(path) else "❌"
     print(f"   {exists} {path}")
 
 # Check 3: PyYAML
@@ -44,7 +58,7 @@ except ImportError:
 print("\n4. Loading config.yaml:")
 config_file = None
 for path in [Path.cwd() / "config.yaml", Path(__file__).parent / "config.yaml"]:
-    if path.exists():
+    if path_exists(path):
         config_file = path
         break
 
@@ -52,8 +66,12 @@ if config_file:
     print(f"   Found at: {config_file}")
     try:
         import yaml
+        try:
+            from yaml import CSafeLoader as YamlLoader
+        except ImportError:
+            from yaml import SafeLoader as YamlLoader
         with open(config_file, 'r') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=YamlLoader)
         print(f"   ✅ Valid YAML syntax")
         print(f"   Top-level keys: {list(data.keys())}")
         
@@ -81,7 +99,7 @@ else:
 # Check 5: Load .env
 print("\n5. Loading .env:")
 env_file = Path.cwd() / ".env"
-if env_file.exists():
+if path_exists(env_file):
     print(f"   Found at: {env_file}")
     from dotenv import load_dotenv
     load_dotenv()
@@ -4,18 +4,61 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.agent.graph import BillTrackerAgent, create_agent
+# Agent, scan-type config, reminder modules and asyncio are imported inside
+# the functions that need them so that --setup/--show-config/--validate/--list-types
+# don't pay for loading LangGraph, LangChain and the API SDKs.
 from src.config.settings import settings, Settings
-from src.config.email_scan_config import config as email_config
-from src.modules.reminder_scheduler import ReminderScheduler
-from src.modules.reminder_storage import ReminderStorage
-from src.modules.reminder_system import ReminderSystem
+from collections import deque
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 import argparse
-import atexit
+import signal
+import threading
 
 # Global scheduler instance
-_scheduler: ReminderScheduler = None
+_scheduler = None
+
+# Set once validate_configuration() succeeds
+_validated = False
+
+# Seconds to wait for the scheduler thread to finish on shutdown
+SCHEDULER_STOP_TIMEOUT = 2.0
+
+BANNER = """
+    ╔═══════════════════════════════════════════════════════════════╗
+    ║                                                               ║
+    ║              📋 BILL TRACKER AGENT 🤖                         ║
+    ║                                                               ║
+    ║         Intelligent Bill Management with AI                   ║
+    ║                                                               ║
+    ╚═══════════════════════════════════════════════════════════════╝
+    
+"""
+
+# Interactive commands that end the session
+EXIT_COMMANDS = frozenset({"exit", "quit", "q"})
+
+# Number of interactive queries kept for the 'history' command
+HISTORY_MAX = 1000
+
+
+@lru_cache(maxsize=2)
+def get_agent(use_node_cache: bool = False):
+    """
+    Return the process-wide agent, building (and compiling its graph) only once.
+    
+    Args:
+        use_node_cache: Attach an in-memory LangGraph node cache (used by batch mode
+            so repeated queries skip intent classification)
+    """
+    from src.agent.graph import create_agent
+
+    cache = None
+    if use_node_cache:
+        from langgraph.cache.memory import InMemoryCache
+        cache = InMemoryCache()
+    return create_agent(cache=cache)
 
 
 def start_reminder_scheduler():
@@ -26,6 +69,10 @@ def start_reminder_scheduler():
         print("   Reminders disabled in config")
         return None
 
+    from src.modules.reminder_scheduler import ReminderScheduler
+    from src.modules.reminder_storage import ReminderStorage
+    from src.modules.reminder_system import ReminderSystem
+
     try:
         # Initialize storage
         storage = ReminderStorage(db_path=settings.REMINDER_DB_PATH)
@@ -51,12 +98,9 @@ def start_reminder_scheduler():
             check_interval=settings.REMINDER_CHECK_INTERVAL
         )
 
-        # Start background thread
+        # Start background thread; interactive_mode stops it on the way out
         _scheduler.start()
 
-        # Register cleanup on exit
-        atexit.register(stop_reminder_scheduler)
-
         return _scheduler
 
     except Exception as e:
@@ -68,7 +112,7 @@ def stop_reminder_scheduler():
     """Stop the reminder scheduler gracefully"""
     global _scheduler
     if _scheduler:
-        _scheduler.stop()
+        _scheduler.stop(timeout=SCHEDULER_STOP_TIMEOUT)
         _scheduler = None
 
 
@@ -80,17 +124,47 @@ def get_scheduler_status() -> dict:
     return {"running": False, "message": "Scheduler not initialized"}
 
 
+def print_scheduler_status():
+    """Print reminder scheduler status for the 'reminders' command"""
+    status = get_scheduler_status()
+    print(f"\n⏰ Reminder Scheduler Status:")
+    print(f"   Running: {'✅ Yes' if status.get('running') else '❌ No'}")
+    if status.get('stats'):
+        stats = status['stats']
+        print(f"   Pending: {stats.get('pending', 0)}")
+        print(f"   Sent: {stats.get('sent', 0)}")
+        print(f"   Failed: {stats.get('failed', 0)}")
+    if status.get('upcoming_24h', 0) > 0:
+        print(f"   Upcoming (24h): {status['upcoming_24h']}")
+        if status.get('next_reminders'):
+            print(f"   Next reminders:")
+            for rem in status['next_reminders'][:3]:
+                print(f"      - {rem.get('vendor', 'Unknown')}: {rem.get('reminder_date', 'N/A')}")
+
+
+def check_reminders_now():
+    """Manually trigger a reminder check for the 'check-reminders' command"""
+    if _scheduler:
+        print("\n⏰ Manually checking reminders...")
+        result = _scheduler.check_now()
+        print(f"   Checked: {result.get('checked', 0)}")
+        print(f"   Sent: {result.get('sent', 0)}")
+        print(f"   Failed: {result.get('failed', 0)}")
+    else:
+        print("\n❌ Scheduler not running")
+
+
+def clear_screen():
+    if os.name == 'nt':
+        os.system('cls')
+    else:
+        # Clear screen and home the cursor without spawning a shell
+        sys.stdout.write("\x1b[2J\x1b[H")
+    print_banner()
+
+
 def print_banner():
-    banner = """
-    ╔═══════════════════════════════════════════════════════════════╗
-    ║                                                               ║
-    ║              📋 BILL TRACKER AGENT 🤖                         ║
-    ║                                                               ║
-    ║         Intelligent Bill Management with AI                   ║
-    ║                                                               ║
-    ╚═══════════════════════════════════════════════════════════════╝
-    """
-    print(banner)
+    sys.stdout.write(BANNER)
 
 
 def setup_configuration():
@@ -138,10 +212,17 @@ def setup_configuration():
     print("💡 Or start interactive mode: python main.py (no arguments)\n")
 
 
-def validate_configuration(interactive: bool = False):
+def validate_configuration(interactive: bool = False, force: bool = False):
     """
     Validate configuration with optional interactive prompts
+    
+    A successful validation is remembered for the rest of the process;
+    pass force=True to re-run the checks.
     """
+    global _validated
+    if _validated and not force:
+        return True
+    
     print("\n🔍 Validating configuration...")
     
     is_valid, errors = settings.validate(interactive=interactive)
@@ -162,10 +243,11 @@ def validate_configuration(interactive: bool = False):
     
     print("✅ Configuration validated successfully!")
     print("\n" + settings.get_config_summary())
+    _validated = True
     return True
 
 
-def interactive_mode(scan_type=None, scan_days=None):
+def interactive_mode(scan_type=None, scan_days=None, use_cache: bool = True):
     print_banner()
 
     if not validate_configuration(interactive=True):
@@ -173,10 +255,11 @@ def interactive_mode(scan_type=None, scan_days=None):
         return
     if scan_type:
         print(f"📧 Default scan type: {scan_type}")
+    default_days = settings.DEFAULT_DAYS_BACK
     if scan_days:
         print(f"📅 Default scan days: {scan_days}")
     else:
-        print(f"📅 Default scan days: {settings.DEFAULT_DAYS_BACK}")
+        print(f"📅 Default scan days: {default_days}")
 
     print("\n⏰ Starting reminder scheduler...")
     scheduler = start_reminder_scheduler()
@@ -187,136 +270,97 @@ def interactive_mode(scan_type=None, scan_days=None):
 
     print("\n💡 Type 'help' for available commands, 'exit' to quit\n")
 
+    from src.config.email_scan_config import config as email_config
+
     try:
-        agent = create_agent()
+        agent = get_agent()
     except Exception as e:
         print(f"\n❌ Failed to initialize agent: {e}")
+        stop_reminder_scheduler()
         return
 
-    history = []
+    history = deque(maxlen=HISTORY_MAX)
 
-    while True:
-        try:
-            user_input = input("\n💬 You: ").strip()
-            
-            if not user_input:
-                continue
-            
-            if user_input.lower() in ['exit', 'quit', 'q']:
-                print("\n👋 Goodbye! Have a great day!")
-                break
-            
-            elif user_input.lower() == 'help':
-                print_help()
-                continue
+    commands = {
+        "help": print_help,
+        "types": lambda: print(email_config.get_config_summary()),
+        "history": lambda: print_history(history),
+        "clear": clear_screen,
+        "config": lambda: print("\n" + settings.get_config_summary()),
+        "setup": setup_configuration,
+        "reminders": print_scheduler_status,
+        "check-reminders": check_reminders_now,
+    }
+
+    try:
+        while True:
+            try:
+                user_input = input("\n💬 You: ").strip()
             
-            elif user_input.lower() == 'types':
-                print(email_config.get_config_summary())
-                continue
+                if not user_input:
+                    continue
             
-            elif user_input.lower() == 'history':
-                print_history(history)
-                continue
+                command = user_input.lower()
             
-            elif user_input.lower() == 'clear':
-                os.system('clear' if os.name == 'posix' else 'cls')
-                print_banner()
-                continue
+                if command in EXIT_COMMANDS:
+                    print("\n👋 Goodbye! Have a great day!")
+                    break
             
-            elif user_input.lower() == 'config':
-                print("\n" + settings.get_config_summary())
-                continue
+                handler = commands.get(command)
+                if handler:
+                    handler()
+                    continue
+
+                history.append({
+                    "timestamp": datetime.now().isoformat(),
+                    "query": user_input
+                })
             
-            elif user_input.lower() == 'setup':
-                setup_configuration()
-                continue
-
-            elif user_input.lower() == 'reminders':
-                status = get_scheduler_status()
-                print(f"\n⏰ Reminder Scheduler Status:")
-                print(f"   Running: {'✅ Yes' if status.get('running') else '❌ No'}")
-                if status.get('stats'):
-                    stats = status['stats']
-                    print(f"   Pending: {stats.get('pending', 0)}")
-                    print(f"   Sent: {stats.get('sent', 0)}")
-                    print(f"   Failed: {stats.get('failed', 0)}")
-                if status.get('upcoming_24h', 0) > 0:
-                    print(f"   Upcoming (24h): {status['upcoming_24h']}")
-                    if status.get('next_reminders'):
-                        print(f"   Next reminders:")
-                        for rem in status['next_reminders'][:3]:
-                            print(f"      - {rem.get('vendor', 'Unknown')}: {rem.get('reminder_date', 'N/A')}")
-                continue
-
-            elif user_input.lower() == 'check-reminders':
-                if _scheduler:
-                    print("\n⏰ Manually checking reminders...")
-                    result = _scheduler.check_now()
-                    print(f"   Checked: {result.get('checked', 0)}")
-                    print(f"   Sent: {result.get('sent', 0)}")
-                    print(f"   Failed: {result.get('failed', 0)}")
-                else:
-                    print("\n❌ Scheduler not running")
-                continue
-
-            history.append({
-                "timestamp": datetime.now().isoformat(),
-                "query": user_input
-            })
+                enriched_query = enrich_query(
+                    user_input, scan_type, scan_days, default_days,
+                    query_lower=command, only_scan_queries=True
+                )
             
-            enriched_query = user_input
-            if scan_type and "scan" in user_input.lower():
-                enriched_query += f" [type:{scan_type}]"
+                result = agent.invoke(enriched_query, verbose=True, use_cache=use_cache)
             
-            if scan_days:
-                if "scan" in user_input.lower():
-                    enriched_query += f" [days:{scan_days}]"
-            elif "scan" in user_input.lower() and "days" not in user_input.lower():
-                enriched_query += f" [days:{settings.DEFAULT_DAYS_BACK}]"
+                print(f"\n🤖 Agent: {result['response']}")
             
-            result = agent.invoke(enriched_query, verbose=True)
+                if result.get('metadata'):
+                    meta = result['metadata']
+                    if meta.get('saved_bills', 0) > 0:
+                        print(f"\n💾 Saved {meta['saved_bills']} bills")
+                    if meta.get('reminders_created', 0) > 0:
+                        print(f"⏰ Created {meta['reminders_created']} reminders")
             
-            print(f"\n🤖 Agent: {result['response']}")
-            
-            if result.get('metadata'):
-                meta = result['metadata']
-                if meta.get('saved_bills', 0) > 0:
-                    print(f"\n💾 Saved {meta['saved_bills']} bills")
-                if meta.get('reminders_created', 0) > 0:
-                    print(f"⏰ Created {meta['reminders_created']} reminders")
-            
-            if result.get('errors'):
-                print(f"\n⚠️  Warnings/Errors:")
-                for error in result['errors'][:3]:
-                    print(f"   - {error}")
+                if result.get('errors'):
+                    print(f"\n⚠️  Warnings/Errors:")
+                    for error in result['errors'][:3]:
+                        print(f"   - {error}")
         
-        except KeyboardInterrupt:
-            print("\n\n⚠️  Interrupted. Type 'exit' to quit or continue chatting.")
-            continue
+            except KeyboardInterrupt:
+                print("\n\n⚠️  Interrupted. Type 'exit' to quit or continue chatting.")
+                continue
         
-        except Exception as e:
-            print(f"\n❌ Error: {e}")
-            continue
+            except Exception as e:
+                print(f"\n❌ Error: {e}")
+                continue
+    finally:
+        stop_reminder_scheduler()
 
 
-def single_query_mode(query: str, user_id: str = "default", scan_type=None, scan_days=None):
+def single_query_mode(query: str, user_id: str = "default", scan_type=None, scan_days=None, use_cache: bool = True):
     print_banner()
     
     if not validate_configuration():
         return
     
-    if scan_type:
-        query += f" [type:{scan_type}]"
-    if scan_days:
-        query += f" [days:{scan_days}]"
-    elif "scan" in query.lower():
-        query += f" [days:{settings.DEFAULT_DAYS_BACK}]"
+    query = enrich_query(query, scan_type, scan_days)
     
     print(f"\n📝 Query: {query}\n")
     
     try:
-        agent = create_agent()
-        result = agent.invoke(query, user_id=user_id, verbose=True)
+        agent = get_agent()
+        result = agent.invoke(query, user_id=user_id, verbose=True, use_cache=use_cache)
         
         print(f"\n🤖 Response:")
         print(result['response'])
@@ -328,7 +372,7 @@ def single_query_mode(query: str, user_id: str = "default", scan_type=None, scan
         return None
 
 
-def batch_mode(queries_file: str, scan_type=None, scan_days=None):
+def batch_mode(queries_file: str, scan_type=None, scan_days=None, use_cache: bool = True):
     print_banner()
     
     if not validate_configuration():
@@ -337,45 +381,128 @@ def batch_mode(queries_file: str, scan_type=None, scan_days=None):
     print(f"\n📂 Loading queries from: {queries_file}\n")
     
     try:
-        with open(queries_file, 'r') as f:
-            queries = [line.strip() for line in f if line.strip()]
+        f = open(queries_file, 'r')
     except FileNotFoundError:
         print(f"❌ File not found: {queries_file}")
         return
     
-    print(f"📋 Found {len(queries)} queries\n")
+    agent = get_agent(use_node_cache=use_cache)
     
-    agent = create_agent()
-    results = []
+    default_days = settings.DEFAULT_DAYS_BACK
     
-    for i, query in enumerate(queries, 1):
-        print(f"\n{'='*70}")
-        print(f"Query {i}/{len(queries)}: {query}")
-        print(f"{'='*70}")
-        
-        enriched_query = query
-        if scan_type:
-            enriched_query += f" [type:{scan_type}]"
-        if scan_days:
-            enriched_query += f" [days:{scan_days}]"
-        elif "scan" in query.lower():
-            enriched_query += f" [days:{settings.DEFAULT_DAYS_BACK}]"
-        
-        result = agent.invoke(enriched_query, verbose=True)
-        results.append(result)
-        
-        print(f"\n🤖 Response: {result['response']}\n")
+    with f:
+        queries = (
+            enrich_query(query, scan_type, scan_days, default_days)
+            for query in _iter_queries(f)
+        )
+        summary = _run_async(_run_batch(agent, queries, use_cache=use_cache))
     
     print(f"\n{'='*70}")
     print("BATCH EXECUTION SUMMARY")
     print(f"{'='*70}")
-    print(f"Total Queries: {len(results)}")
-    print(f"Successful: {sum(1 for r in results if r['success'])}")
-    print(f"Failed: {sum(1 for r in results if not r['success'])}")
-    print(f"Average Time: {sum(r['execution_time'] for r in results) / len(results):.2f}s")
+    print(f"Total Queries: {summary['total']}")
+    print(f"Successful: {summary['successful']}")
+    print(f"Failed: {summary['failed']}")
+    print(f"Average Time: {summary['average_time']:.2f}s")
     print(f"{'='*70}\n")
 
 
+def _iter_queries(lines):
+    """Yield stripped, non-empty query lines without reading the whole file"""
+    for line in lines:
+        query = line.strip()
+        if query:
+            yield query
+
+
+def enrich_query(
+    query: str,
+    scan_type=None,
+    scan_days=None,
+    default_days=None,
+    query_lower=None,
+    only_scan_queries: bool = False
+) -> str:
+    """
+    Append [type:...] / [days:...] hints for the intent classifier.
+    
+    Args:
+        query: Raw user query
+        scan_type: Scan type from --scan-type
+        scan_days: Days from --days
+        default_days: Fallback days for scan queries (default: settings.DEFAULT_DAYS_BACK)
+        query_lower: Pre-lowercased query, if the caller already has it
+        only_scan_queries: Interactive behaviour - only tag queries mentioning "scan",
+            and don't add default days when the user already said "days"
+    """
+    if query_lower is None:
+        query_lower = query.lower()
+    is_scan = "scan" in query_lower
+    tag_query = is_scan or not only_scan_queries
+    
+    type_tag = f" [type:{scan_type}]" if scan_type and tag_query else ""
+    if scan_days:
+        days_tag = f" [days:{scan_days}]" if tag_query else ""
+    elif is_scan and not (only_scan_queries and "days" in query_lower):
+        if default_days is None:
+            default_days = settings.DEFAULT_DAYS_BACK
+        days_tag = f" [days:{default_days}]"
+    else:
+        days_tag = ""
+    
+    return f"{query}{type_tag}{days_tag}"
+
+
+def _run_async(coro):
+    """Run a coroutine on uvloop when it is installed, else on the default asyncio loop"""
+    try:
+        import uvloop
+    except ImportError:
+        import asyncio
+        return asyncio.run(coro)
+    return uvloop.run(coro)
+
+
+async def _run_batch(agent, queries, concurrency: int = None, use_cache: bool = True) -> dict:
+    """
+    Run queries concurrently on one agent, at most `concurrency` in flight
+    (default: settings.BATCH_CONCURRENCY).
+    
+    LangGraph runs the synchronous nodes of each ainvoke() in its executor
+    threads, so the blocking LLM/Gmail/vector-store calls overlap across queries.
+    
+    Queries are pulled lazily from the iterator and results are folded into
+    running totals, so memory stays constant regardless of batch size.
+    """
+    import asyncio
+
+    if concurrency is None:
+        concurrency = settings.BATCH_CONCURRENCY
+    summary = {"total": 0, "successful": 0, "failed": 0, "average_time": 0.0}
+    numbered = enumerate(queries, 1)
+    
+    async def worker():
+        # Workers share one iterator; next() only runs between awaits
+        for i, query in numbered:
+            result = await agent.ainvoke(query, verbose=False, use_cache=use_cache)
+            
+            summary["total"] += 1
+            if result['success']:
+                summary["successful"] += 1
+            else:
+                summary["failed"] += 1
+            summary["average_time"] += (result['execution_time'] - summary["average_time"]) / summary["total"]
+            
+            # Verbose graph output would interleave, so report per query once done
+            print(f"\n{'='*70}")
+            print(f"Query {i}: {query}")
+            print(f"{'='*70}")
+            print(f"\n🤖 Response: {result['response']}\n")
+    
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summary
+
+
 def print_help():
     help_text = """
     📚 Available Commands:
@@ -420,11 +547,14 @@ def print_history(history):
         return
     
     print(f"\n📚 Query History ({len(history)} queries):\n")
-    for i, item in enumerate(history[-10:], 1):
+    recent = islice(history, max(0, len(history) - 10), None)
+    for i, item in enumerate(recent, 1):
         print(f"{i}. [{item['timestamp']}] {item['query']}")
 
 
 def list_email_types():
+    from src.config.email_scan_config import config as email_config
+
     print_banner()
     print(email_config.get_config_summary())
     print("\n💡 Use with: python main.py --scan-type <type> --query \"scan my email\"")
@@ -455,7 +585,22 @@ def show_config_info():
     print("\n💡 To setup configuration: python main.py --setup")
 
 
-def main():
+class _ScanTypeAction(argparse.Action):
+    """Validate --scan-type against the email scan config only when the flag is given"""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        from src.config.email_scan_config import config as email_config
+
+        choices = email_config.get_all_types()
+        if values not in choices:
+            parser.error(
+                f"argument {option_string}: invalid choice: '{values}' "
+                f"(choose from {', '.join(choices)})"
+            )
+        setattr(namespace, self.dest, values)
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Bill Tracker Agent - Intelligent Bill Management",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -493,7 +638,7 @@ Examples:
     parser.add_argument(
         "-t", "--scan-type",
         type=str,
-        choices=email_config.get_all_types(),
+        action=_ScanTypeAction,
         help="Email scan type (bills, promotions, orders, etc.)"
     )
     
@@ -503,6 +648,12 @@ Examples:
         help=f"Number of days to scan back (default: from config.yaml)"
     )
     
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Skip cached agent responses and intent classifications"
+    )
+    
     parser.add_argument(
         "--list-types",
         action="store_true",
@@ -533,37 +684,75 @@ Examples:
         help="Enable interactive API key prompts during validation"
     )
     
-    args = parser.parse_args()
+    return parser
+
+
+def handle_special_commands(argv=None) -> bool:
+    """
+    Phase 1 of argument parsing: run --setup/--show-config/--list-types/--validate
+    from a minimal parser, without building the full CLI parser.
+    
+    Returns:
+        True if a special command was handled and the program should exit
+    """
+    quick_parser = argparse.ArgumentParser(add_help=False)
+    quick_parser.add_argument("--setup", action="store_true")
+    quick_parser.add_argument("--show-config", action="store_true")
+    quick_parser.add_argument("--list-types", action="store_true")
+    quick_parser.add_argument("--validate", action="store_true")
+    quick_parser.add_argument("--interactive", action="store_true")
+    args, remaining = quick_parser.parse_known_args(argv)
+    
+    # Let the full parser print help
+    if "-h" in remaining or "--help" in remaining:
+        return False
     
-    # Handle special commands first
     if args.setup:
         setup_configuration()
-        return
+        return True
     
     if args.show_config:
         show_config_info()
-        return
+        return True
     
     if args.list_types:
         list_email_types()
-        return
+        return True
     
     if args.validate:
         print_banner()
         validate_configuration(interactive=args.interactive)
+        return True
+    
+    return False
+
+
+def _handle_sigterm(signum, frame):
+    """Turn SIGTERM into SystemExit so interactive_mode's cleanup stops the scheduler"""
+    raise SystemExit(128 + signum)
+
+
+def main():
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _handle_sigterm)
+    
+    # Handle special commands first
+    if handle_special_commands():
         return
     
+    args = build_parser().parse_args()
+    
     # Normal execution modes
     if args.query:
-        single_query_mode(args.query, args.user, args.scan_type, args.days)
+        single_query_mode(args.query, args.user, args.scan_type, args.days, use_cache=not args.no_cache)
         return
     
     if args.batch:
-        batch_mode(args.batch, args.scan_type, args.days)
+        batch_mode(args.batch, args.scan_type, args.days, use_cache=not args.no_cache)
         return
     
     # Default: Interactive mode
-    interactive_mode(args.scan_type, args.days)
+    interactive_mode(args.scan_type, args.days, use_cache=not args.no_cache)
 
 
 if __name__ == "__main__":
@@ -1,38 +1,108 @@
-from langgraph.graph import StateGraph, END
+from langgraph.constants import END
 from src.agent.state import AgentState, create_initial_state
-from src.agent.nodes import (
-    intent_classifier_node,
-    planner_node,
-    email_scanner_node,
-    pdf_processor_node,
-    data_extractor_node,
-    database_saver_node,
-    rag_indexer_node,
-    rag_retriever_node,
-    database_query_node,
-    web_searcher_node,
-    reminder_creator_node,
-    response_generator_node,
-    error_handler_node,
-    should_continue,
-    route_after_intent,
-    route_after_plan
+from src.config.settings import settings
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+from collections import OrderedDict
+import copy
+import asyncio
+import logging
+import sys
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+_RULE = "=" * 70
+
+# Whole-response cache for read-only queries. It is only valid for a single
+# writer: only runs through the same agent instance invalidate it, so data saved
+# by another process or agent (the reminder scheduler, a second CLI) can be
+# served stale for up to RESPONSE_CACHE_TTL.
+RESPONSE_CACHE_TTL = 300  # seconds
+RESPONSE_CACHE_MAX = 256
+# response_generator pushes every answer to these channels, and a cache hit
+# skips it, so the cache is bypassed while one of them is configured
+_PUSH_CHANNELS = frozenset({"whatsapp", "telegram"})
+# Steps that write to the vector store / reminder DB; their runs are never cached
+# and they invalidate the user's cached answers. document_pipeline runs
+# database_saver inline, so it only ever appears as its own node name.
+MUTATING_STEPS = frozenset({"database_saver", "document_pipeline", "reminder_creator"})
+
+# Nodes that hand control back to the plan via should_continue
+WORKER_NODES = (
+    "email_scanner",
+    "pdf_processor",
+    "data_extractor",
+    "database_saver",
+    "document_pipeline",
+    "rag_indexer",
+    "rag_retriever",
+    "database_query",
+    "web_searcher",
+    "parallel_lookup",
+    "reminder_creator"
 )
-from typing import Dict
-from datetime import datetime
 
+COMPREHENSIVE_STEP_MAPPING = {
+    **{node: node for node in WORKER_NODES},
+    "response_generator": "response_generator",
+    "error_handler": "error_handler",
+    "end": END
+}
+
+# First plan step after the planner: any worker, or straight to the response
+PLAN_ENTRY_MAPPING = {
+    step: COMPREHENSIVE_STEP_MAPPING[step] for step in WORKER_NODES + ("response_generator",)
+}
 
-def build_graph() -> StateGraph:
+
+def build_graph(cache=None):
     """
     Build the complete agent workflow graph.
     
+    Args:
+        cache: Optional LangGraph BaseCache. When given, intent classification
+            results are cached per (user, query text) so repeated queries skip the LLM.
+    
     Returns:
         Compiled StateGraph ready for execution
     """
+    # Imported here so importing this module doesn't load LangChain, the node
+    # tools and their API clients until a graph is actually needed
+    from langgraph.graph import StateGraph
+    from src.agent.nodes import (
+        intent_classifier_node,
+        planner_node,
+        email_scanner_node,
+        pdf_processor_node,
+        data_extractor_node,
+        database_saver_node,
+        document_pipeline_node,
+        rag_indexer_node,
+        rag_retriever_node,
+        database_query_node,
+        web_searcher_node,
+        parallel_lookup_node,
+        reminder_creator_node,
+        response_generator_node,
+        error_handler_node,
+        should_continue,
+        route_after_intent,
+        route_after_plan
+    )
+    
     workflow = StateGraph(AgentState)
     
+    intent_cache_policy = None
+    if cache is not None:
+        from langgraph.types import CachePolicy
+        intent_cache_policy = CachePolicy(
+            key_func=lambda state: f"{state.get('user_id', 'default')}\x00{state['user_query']}"
+        )
+    
     # Core nodes
-    workflow.add_node("intent_classifier", intent_classifier_node)
+    workflow.add_node("intent_classifier", intent_classifier_node, cache_policy=intent_cache_policy)
     workflow.add_node("planner", planner_node)
     workflow.add_node("response_generator", response_generator_node)
     workflow.add_node("error_handler", error_handler_node)
@@ -41,6 +111,7 @@ def build_graph() -> StateGraph:
     workflow.add_node("email_scanner", email_scanner_node)
     workflow.add_node("pdf_processor", pdf_processor_node)
     workflow.add_node("data_extractor", data_extractor_node)
+    workflow.add_node("document_pipeline", document_pipeline_node)
     
     # Database nodes
     workflow.add_node("database_saver", database_saver_node)
@@ -52,6 +123,7 @@ def build_graph() -> StateGraph:
     
     # Web & Reminders
     workflow.add_node("web_searcher", web_searcher_node)
+    workflow.add_node("parallel_lookup", parallel_lookup_node)
     workflow.add_node("reminder_creator", reminder_creator_node)
     
     workflow.set_entry_point("intent_classifier")
@@ -66,186 +138,354 @@ def build_graph() -> StateGraph:
         }
     )
     
-    workflow.add_conditional_edges(
-        "planner",
-        route_after_plan,
-        {
-            "email_scanner": "email_scanner",
-            "pdf_processor": "pdf_processor",
-            "data_extractor": "data_extractor",
-            "database_saver": "database_saver",
-            "rag_indexer": "rag_indexer",
-            "rag_retriever": "rag_retriever",
-            "database_query": "database_query",
-            "web_searcher": "web_searcher",
-            "reminder_creator": "reminder_creator",
-            "response_generator": "response_generator"
-        }
-    )
+    workflow.add_conditional_edges("planner", route_after_plan, PLAN_ENTRY_MAPPING)
         
-    COMPREHENSIVE_STEP_MAPPING = {
-        "email_scanner": "email_scanner",
-        "pdf_processor": "pdf_processor",
-        "data_extractor": "data_extractor",
-        "database_saver": "database_saver",
-        "rag_indexer": "rag_indexer",
-        "rag_retriever": "rag_retriever",
-        "database_query": "database_query",
-        "web_searcher": "web_searcher",
-        "reminder_creator": "reminder_creator",
-        "response_generator": "response_generator",
-        "error_handler": "error_handler",
-        "end": END
-    }
-    
-    workflow.add_conditional_edges(
-        "email_scanner",
-        should_continue,
-        COMPREHENSIVE_STEP_MAPPING
-    )
-    
-    workflow.add_conditional_edges(
-        "pdf_processor",
-        should_continue,
-        COMPREHENSIVE_STEP_MAPPING
-    )
-    
-    workflow.add_conditional_edges(
-        "data_extractor",
-        should_continue,
-        COMPREHENSIVE_STEP_MAPPING
-    )
-    
-    workflow.add_conditional_edges(
-        "database_saver",
-        should_continue,
-        COMPREHENSIVE_STEP_MAPPING
-    )
-    
-    workflow.add_conditional_edges(
-        "rag_indexer",
-        should_continue,
-        COMPREHENSIVE_STEP_MAPPING
-    )
-    
-    workflow.add_conditional_edges(
-        "rag_retriever",
-        should_continue,
-        COMPREHENSIVE_STEP_MAPPING
-    )
-    
-    workflow.add_conditional_edges(
-        "database_query",
-        should_continue,
-        COMPREHENSIVE_STEP_MAPPING
-    )
-    
-    workflow.add_conditional_edges(
-        "web_searcher",
-        should_continue,
-        COMPREHENSIVE_STEP_MAPPING
-    )
-    
-    workflow.add_conditional_edges(
-        "reminder_creator",
-        should_continue,
-        COMPREHENSIVE_STEP_MAPPING
-    )
+    for node in WORKER_NODES:
+        workflow.add_conditional_edges(node, should_continue, COMPREHENSIVE_STEP_MAPPING)
     
     workflow.add_edge("response_generator", END)
     workflow.add_edge("error_handler", END)
     
-    return workflow.compile()
+    return workflow.compile(cache=cache)
+
+
+_COMPILED_GRAPH = None
+_COMPILED_GRAPH_LOCK = threading.Lock()
+
+
+def _get_compiled_graph():
+    """Return the shared uncached graph, compiling it on first use"""
+    global _COMPILED_GRAPH
+    if _COMPILED_GRAPH is None:
+        with _COMPILED_GRAPH_LOCK:
+            if _COMPILED_GRAPH is None:
+                _COMPILED_GRAPH = build_graph()
+    return _COMPILED_GRAPH
+
+
+def __getattr__(name):
+    # langgraph.json loads `graph` from this module; compile lazily so plain imports stay cheap
+    if name == "graph":
+        return _get_compiled_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _collect_steps(steps: set, chunk: Dict) -> None:
+    """Add the node names and completed_steps of a stream_mode="updates" chunk"""
+    steps.update(chunk)
+    for update in chunk.values():
+        if isinstance(update, dict):
+            steps.update(update.get("completed_steps", ()))
 
 
 class BillTrackerAgent:
     
-    def __init__(self):
-        """Initialize the agent with compiled graph"""
+    def __init__(self, cache=None):
+        """
+        Initialize the agent with compiled graph.
+        
+        Args:
+            cache: Optional LangGraph BaseCache. Without one, every agent shares
+                a single module-level compiled graph.
+        """
         print("🚀 Initializing Bill Tracker Agent...")
-        self.graph = build_graph()
+        self.graph = _get_compiled_graph() if cache is None else build_graph(cache=cache)
+        self._response_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._response_cache_lock = threading.Lock()
         print("✅ Agent initialized successfully!")
     
     def invoke(
         self, 
         user_query: str, 
         user_id: str = "default",
-        verbose: bool = True
+        verbose: bool = True,
+        use_cache: bool = True
     ) -> Dict:
         """
         Process user query through the agent workflow.
+        
+        Args:
+            user_query: Natural language query
+            user_id: User the query belongs to
+            verbose: Print the run header and summary
+            use_cache: Allow cached responses and intent classifications
         """
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         if verbose:
-            print("\n" + "="*70)
-            print(f"🤖 BILL TRACKER AGENT")
-            print("="*70)
-            print(f"🔍 Query: {user_query}")
-            print(f"👤 User: {user_id}")
-            print("="*70)
+            self._print_header(user_query, user_id)
+        
+        cache_key = self._cache_key(user_query, user_id)
+        cached = self._get_cached_response(cache_key, verbose) if use_cache else None
+        if cached is not None:
+            cached["execution_time"] = time.perf_counter() - start_time
+            return cached
         
         # Create initial state
-        initial_state = create_initial_state(user_query=user_query, user_id=user_id)
+        initial_state = create_initial_state(user_query=user_query, user_id=user_id, use_cache=use_cache)
         
         try:
             # Execute the graph
             final_state = self.graph.invoke(initial_state)
             
-            execution_time = (datetime.now() - start_time).total_seconds()
-            
-            if verbose:
-                print("\n" + "="*70)
-                print("✅ EXECUTION COMPLETE")
-                print("="*70)
-                print(f"⏱️  Time: {execution_time:.2f}s")
-                print(f"🎯 Intent: {final_state.get('intent', 'unknown')}")
-                print(f"🔧 Tools: {', '.join(final_state.get('tools_used', []))}")
-                print(f"📊 Steps: {len(final_state.get('completed_steps', []))}")
-                if final_state.get('errors'):
-                    print(f"⚠️  Errors: {len(final_state['errors'])}")
-                print("="*70)
-            
-            return {
-                "success": True,
-                "response": final_state.get("final_response", ""),
-                "intent": final_state.get("intent", "unknown"),
-                "intent_confidence": final_state.get("intent_confidence", 0.0),
-                "tools_used": final_state.get("tools_used", []),
-                "completed_steps": final_state.get("completed_steps", []),
-                "execution_time": execution_time,
-                "errors": final_state.get("errors", []),
-                "metadata": {
-                    "saved_bills": len(final_state.get("saved_bill_ids", [])),
-                    "retrieved_docs": len(final_state.get("retrieved_documents", [])),
-                    "reminders_created": len(final_state.get("reminders_created", []))
-                }
-            }
+            execution_time = time.perf_counter() - start_time
+            result = self._success_result(final_state, execution_time, verbose)
+            self._store_response(cache_key, result)
+            return result
             
         except Exception as e:
-            execution_time = (datetime.now() - start_time).total_seconds()
+            execution_time = time.perf_counter() - start_time
+            return self._error_result(e, execution_time, verbose)
+    
+    async def ainvoke(
+        self, 
+        user_query: str, 
+        user_id: str = "default",
+        verbose: bool = True,
+        use_cache: bool = True
+    ) -> Dict:
+        """
+        Async variant of invoke() backed by graph.ainvoke, so several queries
+        can share one event loop and overlap their LLM/network I/O.
+        
+        The nodes are synchronous, so LangGraph runs each one in its executor
+        thread pool rather than on the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        
+        if verbose:
+            self._print_header(user_query, user_id)
+        
+        cache_key = self._cache_key(user_query, user_id)
+        cached = self._get_cached_response(cache_key, verbose) if use_cache else None
+        if cached is not None:
+            cached["execution_time"] = loop.time() - start_time
+            return cached
+        
+        initial_state = create_initial_state(user_query=user_query, user_id=user_id, use_cache=use_cache)
+        
+        try:
+            final_state = await self.graph.ainvoke(initial_state)
             
-            if verbose:
-                print(f"\n❌ ERROR: {str(e)}")
-                import traceback
-                traceback.print_exc()
+            execution_time = loop.time() - start_time
+            result = self._success_result(final_state, execution_time, verbose)
+            self._store_response(cache_key, result)
+            return result
             
-            return {
-                "success": False,
-                "response": f"I encountered an error: {str(e)}",
-                "intent": "error",
-                "intent_confidence": 0.0,
-                "tools_used": [],
-                "completed_steps": [],
-                "execution_time": execution_time,
-                "errors": [str(e)],
-                "metadata": {}
+        except Exception as e:
+            execution_time = loop.time() - start_time
+            return self._error_result(e, execution_time, verbose)
+    
+    def _cache_key(self, user_query: str, user_id: str) -> tuple:
+        from src.agent.nodes import _canonical_query
+        return (_canonical_query(user_query), user_id)
+    
+    def _get_cached_response(self, cache_key: tuple, verbose: bool) -> Optional[Dict]:
+        """Return a copy of a fresh cached result for this (query, user), if any"""
+        if settings.NOTIFICATION_CHANNEL in _PUSH_CHANNELS:
+            return None
+        with self._response_cache_lock:
+            entry = self._response_cache.get(cache_key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if time.monotonic() - stored_at > RESPONSE_CACHE_TTL:
+                del self._response_cache[cache_key]
+                return None
+            self._response_cache.move_to_end(cache_key)
+        
+        if verbose:
+            print("♻️  Returning cached response (no new data saved since)")
+        cached = copy.deepcopy(result)
+        cached["metadata"]["cached"] = True
+        return cached
+    
+    def _store_response(self, cache_key: tuple, result: Dict):
+        """
+        Cache a clean read-only result; a run that wrote data instead drops
+        every cached answer for that user, since they may now be stale.
+        """
+        _, user_id = cache_key
+        if self._invalidate_if_mutating(user_id, result["completed_steps"]):
+            return
+        if result["errors"] or settings.NOTIFICATION_CHANNEL in _PUSH_CHANNELS:
+            return
+        with self._response_cache_lock:
+            self._response_cache[cache_key] = (time.monotonic(), copy.deepcopy(result))
+            if len(self._response_cache) > RESPONSE_CACHE_MAX:
+                self._response_cache.popitem(last=False)
+    
+    def _invalidate_if_mutating(self, user_id: str, steps) -> bool:
+        """Drop the user's cached answers if any of these steps wrote data"""
+        if not MUTATING_STEPS.intersection(steps):
+            return False
+        with self._response_cache_lock:
+            for key in [k for k in self._response_cache if k[1] == user_id]:
+                del self._response_cache[key]
+        return True
+    
+    def batch(
+        self,
+        queries: List[str],
+        user_id: str = "default",
+        max_concurrency: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Run several queries through the compiled graph with graph.batch.
+        
+        Args:
+            queries: User queries to process
+            user_id: User the queries belong to
+            max_concurrency: Cap on queries in flight (default: settings.BATCH_CONCURRENCY)
+        
+        Returns:
+            One invoke()-shaped result per query, in input order. execution_time
+            is the wall time of the whole batch, since runs overlap.
+        """
+        start_time = time.perf_counter()
+        final_states = self.graph.batch(
+            [create_initial_state(user_query=q, user_id=user_id) for q in queries],
+            config=self._batch_config(max_concurrency),
+            return_exceptions=True
+        )
+        results = self._batch_results(final_states, time.perf_counter() - start_time)
+        self._invalidate_after_batch(user_id, results)
+        return results
+    
+    async def abatch(
+        self,
+        queries: List[str],
+        user_id: str = "default",
+        max_concurrency: Optional[int] = None
+    ) -> List[Dict]:
+        """Async variant of batch() backed by graph.abatch"""
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        final_states = await self.graph.abatch(
+            [create_initial_state(user_query=q, user_id=user_id) for q in queries],
+            config=self._batch_config(max_concurrency),
+            return_exceptions=True
+        )
+        results = self._batch_results(final_states, loop.time() - start_time)
+        self._invalidate_after_batch(user_id, results)
+        return results
+    
+    def _batch_config(self, max_concurrency: Optional[int]) -> Dict:
+        if max_concurrency is None:
+            max_concurrency = settings.BATCH_CONCURRENCY
+        return {"max_concurrency": max_concurrency}
+    
+    def _batch_results(self, final_states: List, execution_time: float) -> List[Dict]:
+        return [
+            self._error_result(state, execution_time, verbose=False)
+            if isinstance(state, Exception)
+            else self._success_result(state, execution_time, verbose=False)
+            for state in final_states
+        ]
+    
+    def _invalidate_after_batch(self, user_id: str, results: List[Dict]):
+        steps = [step for result in results for step in result["completed_steps"]]
+        self._invalidate_if_mutating(user_id, steps)
+    
+    def stream(self, user_query: str, user_id: str = "default") -> Iterator[Dict]:
+        """
+        Yield one {node_name: update} chunk per node as the graph runs.
+        
+        The update is whatever the node returned. intent_classifier returns
+        only the fields it set; every other node returns the whole state, so
+        its chunk is a full state snapshot, not a diff.
+        """
+        initial_state = create_initial_state(user_query=user_query, user_id=user_id)
+        steps_run = set()
+        try:
+            for chunk in self.graph.stream(initial_state, stream_mode="updates"):
+                _collect_steps(steps_run, chunk)
+                yield chunk
+        finally:
+            # Also runs when the caller stops iterating early
+            self._invalidate_if_mutating(user_id, steps_run)
+    
+    async def astream(self, user_query: str, user_id: str = "default") -> AsyncIterator[Dict]:
+        """Async variant of stream() backed by graph.astream"""
+        initial_state = create_initial_state(user_query=user_query, user_id=user_id)
+        steps_run = set()
+        try:
+            async for chunk in self.graph.astream(initial_state, stream_mode="updates"):
+                _collect_steps(steps_run, chunk)
+                yield chunk
+        finally:
+            self._invalidate_if_mutating(user_id, steps_run)
+    
+    def _print_header(self, user_query: str, user_id: str):
+        sys.stdout.write(
+            f"\n{_RULE}\n"
+            f"🤖 BILL TRACKER AGENT\n"
+            f"{_RULE}\n"
+            f"🔍 Query: {user_query}\n"
+            f"👤 User: {user_id}\n"
+            f"{_RULE}\n"
+        )
+    
+    def _success_result(self, final_state: Dict, execution_time: float, verbose: bool) -> Dict:
+        intent = final_state.get("intent", "unknown")
+        tools_used = final_state.get("tools_used", [])
+        completed_steps = final_state.get("completed_steps", [])
+        errors = final_state.get("errors", [])
+        
+        if verbose:
+            errors_line = f"⚠️  Errors: {len(errors)}\n" if errors else ""
+            sys.stdout.write(
+                f"\n{_RULE}\n"
+                f"✅ EXECUTION COMPLETE\n"
+                f"{_RULE}\n"
+                f"⏱️  Time: {execution_time:.2f}s\n"
+                f"🎯 Intent: {intent}\n"
+                f"🔧 Tools: {', '.join(tools_used)}\n"
+                f"📊 Steps: {len(completed_steps)}\n"
+                f"{errors_line}"
+                f"{_RULE}\n"
+            )
+        
+        return {
+            "success": True,
+            "response": final_state.get("final_response", ""),
+            "intent": intent,
+            "intent_confidence": final_state.get("intent_confidence", 0.0),
+            "tools_used": tools_used,
+            "completed_steps": completed_steps,
+            "execution_time": execution_time,
+            "errors": errors,
+            "metadata": {
+                "saved_bills": len(final_state.get("saved_bill_ids", [])),
+                "retrieved_docs": len(final_state.get("retrieved_documents", [])),
+                "reminders_created": len(final_state.get("reminders_created", []))
             }
+        }
+    
+    def _error_result(self, e: Exception, execution_time: float, verbose: bool) -> Dict:
+        if verbose:
+            print(f"\n❌ ERROR: {str(e)}")
+        # Full traceback only when debug logging is on; formatting it is not free
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Agent graph failed", exc_info=e)
+        
+        return {
+            "success": False,
+            "response": f"I encountered an error: {str(e)}",
+            "intent": "error",
+            "intent_confidence": 0.0,
+            "tools_used": [],
+            "completed_steps": [],
+            "execution_time": execution_time,
+            "errors": [repr(e)],
+            "metadata": {}
+        }
 
 
-def create_agent() -> BillTrackerAgent:
+def create_agent(cache=None) -> BillTrackerAgent:
     """Factory function to create a new agent instance."""
-    return BillTrackerAgent()
+    return BillTrackerAgent(cache=cache)
 
 
 if __name__ == "__main__":
@@ -1,21 +1,154 @@
 from src.agent.state import AgentState
 from src.agent.tools import (
     classify_intent, scan_emails, parse_pdf, extract_data,
-    save_bill, add_to_rag, rag_search, query_database,
+    add_to_rag_batch, bill_document_text, rag_search, query_database,
     web_search
 )
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
+from typing import Dict, Optional
+import copy
+import functools
+import hashlib
+import importlib
+import multiprocessing
 import os
+import re
+import sys
+import threading
 from src.config.settings import settings
-from src.modules.llm_interface import LLMInterface
 
 
-def intent_classifier_node(state: AgentState) -> AgentState:
+def _advance_cursor(state: AgentState, step: str) -> None:
+    plan = state.get("plan", [])
+    cursor = state.get("plan_cursor", 0)
+    if cursor < len(plan) and plan[cursor] == step:
+        state["plan_cursor"] = cursor + 1
+
+
+def _complete_step(state: AgentState, step: str) -> None:
+    """Record a finished plan step and advance the plan cursor past it"""
+    state.setdefault("completed_steps", []).append(step)
+    _advance_cursor(state, step)
+
+
+def idempotent(step: str):
+    """
+    Skip a node whose step is already in completed_steps (graph re-entry, replay).
+    
+    The plan cursor still moves past a skipped step so routing continues.
+    Set state["force_rerun"] to run completed steps again.
+    """
+    def decorator(node):
+        @functools.wraps(node)
+        def wrapper(state: AgentState) -> AgentState:
+            if step in state.get("completed_steps", []) and not state.get("force_rerun"):
+                print(f"\n⏭️  {step}: already completed, skipping")
+                _advance_cursor(state, step)
+                return state
+            return node(state)
+        return wrapper
+    return decorator
+
+
+# Successful classifications keyed by canonical query text (LRU, most recent last)
+_INTENT_CACHE: "OrderedDict[str, dict]" = OrderedDict()
+INTENT_CACHE_MAX = 512
+_INTENT_CACHE_LOCK = threading.Lock()
+
+
+def _canonical_query(user_query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used as the intent cache key"""
+    return " ".join(user_query.lower().split())
+
+
+def _classify_intent_cached(user_query: str, use_cache: bool = True) -> dict:
+    """
+    Classify a query, reusing the LLM result for repeated queries.
+    
+    Only exact repeats (on the canonical text) hit: a classification carries
+    query-specific entities (vendor, scan type, days, channel), so a merely
+    similar query can't safely reuse one.
+    Only successful classifications are cached so a transient API failure
+    is retried on the next identical query. With use_cache=False the LLM is
+    always called, and its answer refreshes the cache.
+    """
+    key = _canonical_query(user_query)
+    cached = None
+    if use_cache:
+        with _INTENT_CACHE_LOCK:
+            cached = _INTENT_CACHE.get(key)
+            if cached is not None:
+                _INTENT_CACHE.move_to_end(key)
+    if cached is not None:
+        print(f"   ♻️  Reusing cached classification")
+        return copy.deepcopy(cached)
+    
+    result = classify_intent.invoke({"user_query": user_query})
+    if result.get("success"):
+        with _INTENT_CACHE_LOCK:
+            _INTENT_CACHE[key] = copy.deepcopy(result)
+            if len(_INTENT_CACHE) > INTENT_CACHE_MAX:
+                _INTENT_CACHE.popitem(last=False)
+    return result
+
+
+# Unambiguous command shapes that don't need the LLM classifier. Scan queries
+# only qualify with an explicit [type:...] tag (added by main.py from --scan-type),
+# since otherwise the LLM has to infer the scan type from free text. They also
+# need a [days:N] tag, or no time expression at all: interactive mode leaves
+# out the tag when the user said "last 7 days", and only the LLM reads that.
+_FAST_SCAN_RE = re.compile(r"^\s*scan\b.*\[type:(?P<scan_type>[\w-]+)\]", re.IGNORECASE | re.DOTALL)
+# Plain listings of stored documents only. Anything the LLM could read
+# differently goes to it: scan triggers and new/recent mail (scan_emails),
+# spending and totals (analyze_spending), reminders (set_reminder),
+# alternatives, adding data and questions about the assistant itself
+_FAST_HISTORY_RE = re.compile(
+    r"^\s*(what|show|list|do i have|did you find)\b"
+    r"(?!.*\b(scan|scanning|check|get|fetch|find|search|inbox|gmail|"
+    r"new|newest|latest|unread|recent|recently|incoming|arrived|received|today|yesterday|this|"
+    r"spend|spent|spending|much|total|sum|average|breakdown|budget|analy[sz]e|analysis|"
+    r"paid|pay|owe|owed|owing|cost|costs|"
+    r"remind|reminders?|alerts?|notify|alternatives?|cheaper|add|can you|do you|are you|help)\b)",
+    re.IGNORECASE | re.DOTALL
+)
+_DAYS_TAG_RE = re.compile(r"\[days:(\d+)\]")
+_TAG_RE = re.compile(r"\[\w+:[^\]]*\]")
+_TIME_EXPRESSION_RE = re.compile(
+    r"\b(\d+|days?|weeks?|months?|years?|today|yesterday|tonight|since|recent|recently)\b",
+    re.IGNORECASE
+)
+
+
+def _match_fast_intent(user_query: str) -> Optional[dict]:
+    """Return a classification result for obvious commands, or None to defer to the LLM"""
+    match = _FAST_SCAN_RE.match(user_query)
+    if match:
+        entities = {"email_scan_type": match.group("scan_type").lower()}
+        days = _DAYS_TAG_RE.search(user_query)
+        if days:
+            entities["scan_days"] = int(days.group(1))
+        elif _TIME_EXPRESSION_RE.search(_TAG_RE.sub("", user_query)):
+            return None
+        return {"success": True, "intent": "scan_emails", "confidence": 1.0, "entities": entities}
+    
+    if _FAST_HISTORY_RE.match(user_query):
+        return {"success": True, "intent": "query_history", "confidence": 1.0, "entities": {}}
+    
+    return None
+
+
+@idempotent("intent_classification")
+def intent_classifier_node(state: AgentState) -> Dict:
     print(f"\n🎯 INTENT CLASSIFIER: Analyzing query...")
-    if "intent_classification" in state.get("completed_steps", []):
-        return state
     
-    result = classify_intent.invoke({"user_query": state["user_query"]})
+    result = _match_fast_intent(state["user_query"])
+    if result is not None:
+        print(f"   ⚡ Matched command pattern, skipping LLM classification")
+    else:
+        result = _classify_intent_cached(state["user_query"], use_cache=state.get("use_cache", True))
     
     if result.get("success"):
         state["intent"] = result.get("intent", "unknown")
@@ -23,72 +156,141 @@ def intent_classifier_node(state: AgentState) -> AgentState:
         state["entities"] = result.get("entities", {})
         
         scan_type = state["entities"].get("email_scan_type", "general")
-        state["completed_steps"] = state.get("completed_steps", []) + ["intent_classification"]
+        state.setdefault("completed_steps", []).append("intent_classification")
         print(f"   Intent: {state['intent']} | Type: {scan_type} | Confidence: {state['intent_confidence']:.2f}")
     else:
-        state["errors"] = state.get("errors", []) + [f"Intent failed: {result.get('error')}"]
+        state.setdefault("errors", []).append(f"Intent failed: {result.get('error')}")
         state["intent"] = "unknown"
-    return state
+    
+    # Only the fields set here: batch mode's node cache replays this dict for
+    # other runs, so it must not carry their user/session fields or the lists
+    # later nodes append to in place
+    return {
+        "intent": state["intent"],
+        "intent_confidence": state.get("intent_confidence", 0.0),
+        "entities": copy.deepcopy(state.get("entities", {})),
+        "completed_steps": list(state.get("completed_steps", [])),
+        "errors": list(state.get("errors", []))
+    }
+
+
+# Heavy modules each step's tools import on first use (Chroma/Voyage, pdfplumber, ...)
+_STEP_MODULES = {
+    "pdf_processor": ("src.modules.pdf_parser",),
+    "data_extractor": ("src.modules.llm_interface",),
+    "database_saver": ("src.modules.rag_system",),
+    "document_pipeline": ("src.modules.pdf_parser", "src.modules.llm_interface", "src.modules.rag_system"),
+    "rag_retriever": ("src.modules.rag_system",),
+    "database_query": ("src.modules.rag_system",),
+    "web_searcher": ("src.modules.web_search",),
+    "parallel_lookup": ("src.modules.rag_system", "src.modules.web_search"),
+    "reminder_creator": ("src.modules.reminder_storage", "src.modules.reminder_system"),
+    "response_generator": ("src.modules.llm_interface",)
+}
+
+# Created on first prefetch, so importing this module (langgraph.json,
+# debug_email.py, PDF worker processes) doesn't start a thread
+_prefetch_executor = None
+_prefetch_executor_lock = threading.Lock()
+
+
+def _import_quietly(module_name: str) -> None:
+    try:
+        importlib.import_module(module_name)
+    except Exception:
+        pass  # The step itself will import again and report the error
 
 
+def _prefetch_step_modules(steps) -> None:
+    """
+    Import the modules later plan steps need in the background.
+    
+    Runs while the first step waits on Gmail/LLM I/O, so later steps don't
+    pay the import cost on the critical path. Already-imported modules are skipped.
+    """
+    pending = []
+    for step in steps:
+        for module_name in _STEP_MODULES.get(step, ()):
+            if module_name not in sys.modules and module_name not in pending:
+                pending.append(module_name)
+    if not pending:
+        return
+    global _prefetch_executor
+    with _prefetch_executor_lock:
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+    for module_name in pending:
+        _prefetch_executor.submit(_import_quietly, module_name)
+
+
+# Fixed plan per intent; anything else searches existing data
+_PLAN_TEMPLATES = {
+    # Full pipeline: Gmail → Extract → Save to DB
+    # (document_pipeline = pdf_processor → data_extractor → database_saver in one step)
+    "scan_emails": ("email_scanner", "document_pipeline", "response_generator"),
+    # Search existing DB only (NO Gmail!)
+    "query_history": ("rag_retriever", "response_generator"),
+    "analyze_spending": ("database_query", "response_generator"),
+    "set_reminder": ("database_query", "reminder_creator", "response_generator"),
+    # DB lookup and web search are independent, so run them together
+    "find_alternatives": ("parallel_lookup", "response_generator"),
+    "manual_add": ("data_extractor", "database_saver", "response_generator")
+}
+_DEFAULT_PLAN = ("rag_retriever", "response_generator")
+
+# Scan types whose bills arrive as attachments
+_ATTACHMENT_SCAN_TYPES = frozenset({"bills", "invoice", "receipts", "orders"})
+
+_PLAN_NOTES = {
+    "scan_emails": "📧 Will fetch NEW emails from Gmail and save to DB",
+    "query_history": "🔍 Will search EXISTING database (no Gmail scan)"
+}
+
+
+@idempotent("planning")
 def planner_node(state: AgentState) -> AgentState:
     print(f"\n📋 PLANNER: Creating execution plan...")
     intent = state["intent"]
     
-    plan = []
-    
-    if intent == "scan_emails":
-        # Full pipeline: Gmail → Extract → Save to DB
-        plan = ["email_scanner", "pdf_processor", "data_extractor", "database_saver", "response_generator"]
-        print(f"   📧 Will fetch NEW emails from Gmail and save to DB")
-            
-    elif intent == "query_history":
-        # Search existing DB only (NO Gmail!)
-        plan = ["rag_retriever", "response_generator"]
-        print(f"   🔍 Will search EXISTING database (no Gmail scan)")
-        
-    elif intent == "analyze_spending":
-        plan = ["database_query", "response_generator"]
-        
-    elif intent == "set_reminder":
-        plan = ["database_query", "reminder_creator", "response_generator"]
-        
-    elif intent == "find_alternatives":
-        plan = ["database_query", "web_searcher", "response_generator"]
-        
-    elif intent == "manual_add":
-        plan = ["data_extractor", "database_saver", "response_generator"]
-        
+    if intent in _PLAN_TEMPLATES:
+        plan = list(_PLAN_TEMPLATES[intent])
+        note = _PLAN_NOTES.get(intent)
     else:
-        # Default: search existing data
-        plan = ["rag_retriever", "response_generator"]
-        print(f"   🔍 Default: Searching database")
+        plan = list(_DEFAULT_PLAN)
+        note = "🔍 Default: Searching database"
+    if note:
+        print(f"   {note}")
     
     state["plan"] = plan
-    state["completed_steps"] = state.get("completed_steps", []) + ["planning"]
+    state["plan_cursor"] = 0
+    _prefetch_step_modules(plan[1:])
+    state.setdefault("completed_steps", []).append("planning")
     print(f"   Plan: {' → '.join(plan)}")
     return state
 
 
+# Gmail inbox category for each scan type; anything else searches primary
+_INBOX_CATEGORY_MAP = {
+    "promotions": "promotions",
+    "discounts": "promotions",
+    "social": "social",
+    "updates": "updates",
+    "forums": "forums",
+}
+
+
+@idempotent("email_scanner")
 def email_scanner_node(state: AgentState) -> AgentState:
     print(f"\n📧 EMAIL SCANNER: Fetching from Gmail...")
     try:
         days = state["entities"].get("scan_days", 30)
-        date_from = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-        date_to = datetime.now().strftime("%Y-%m-%d")
+        now = datetime.now()
+        date_from = (now - timedelta(days=days)).strftime("%Y-%m-%d")
+        date_to = now.strftime("%Y-%m-%d")
 
         scan_type = state["entities"].get("email_scan_type", "general")
-        require_attachments = scan_type in ["bills", "invoice", "receipts", "orders"]
-
-        # Determine inbox category based on scan type
-        inbox_category_map = {
-            "promotions": "promotions",
-            "discounts": "promotions",
-            "social": "social",
-            "updates": "updates",
-            "forums": "forums",
-        }
-        inbox_category = inbox_category_map.get(scan_type, "primary")
+        require_attachments = scan_type in _ATTACHMENT_SCAN_TYPES
+        inbox_category = _INBOX_CATEGORY_MAP.get(scan_type, "primary")
 
         print(f"   Date range: {date_from} to {date_to} ({days} days)")
         print(f"   Type: {scan_type} | Category: {inbox_category} | Attachments: {require_attachments}")
@@ -109,103 +311,285 @@ def email_scanner_node(state: AgentState) -> AgentState:
             state["email_scan_results"] = result
             
             if require_attachments:
-                state["downloaded_files"] = [
-                    att["filepath"] for email in result.get("results", []) 
-                    for att in email.get("attachments", [])
-                ]
+                attachments = chain.from_iterable(
+                    email.get("attachments") or () for email in result.get("results") or ()
+                )
+                state["downloaded_files"] = [att["filepath"] for att in attachments]
             else:
                 state["downloaded_files"] = []
                 
             print(f"   ✅ Found {result.get('filtered_count', 0)} relevant emails")
             print(f"   ⊗ Filtered out {result.get('filtered_out', 0)} irrelevant emails")
         else:
-            state["errors"] = state.get("errors", []) + [f"Scan failed: {result.get('error')}"]
+            state.setdefault("errors", []).append(f"Scan failed: {result.get('error')}")
             
     except Exception as e:
         print(f"   ❌ Error: {e}")
-        state["errors"] = state.get("errors", []) + [f"Scanner Error: {str(e)}"]
+        state.setdefault("errors", []).append(f"Scanner Error: {str(e)}")
     
-    state["completed_steps"] = state.get("completed_steps", []) + ["email_scanner"]
+    _complete_step(state, "email_scanner")
     return state
 
 
+# Attachment extensions pdf_processor_node parses (matched case-insensitively)
+_PARSEABLE_EXTENSIONS = (".pdf",)
+
+
+# Below this many PDFs, starting worker processes (each re-imports settings and
+# pdfplumber) costs more than it saves, so they're parsed inline
+PDF_POOL_MIN_FILES = 6
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _parse_pdfs(pdf_paths: list) -> list:
+    """
+    Parse PDFs, returning results in input order.
+    
+    pdfplumber is pure Python and CPU-bound, so threads would serialize on the GIL.
+    Large scans go to a process pool that is started on first use and reused
+    for the rest of the process; small ones are parsed inline.
+    """
+    if len(pdf_paths) < PDF_POOL_MIN_FILES or _pdf_workers() <= 1:
+        return [parse_pdf.invoke({"pdf_path": path, "use_ocr": False}) for path in pdf_paths]
+    
+    from src.modules.pdf_parser import parse_pdf_file
+    
+    try:
+        return list(_get_pdf_pool().map(parse_pdf_file, pdf_paths))
+    except Exception as e:
+        print(f"   ⚠️ PDF worker pool failed ({e}), parsing serially")
+        _discard_pdf_pool()
+        return [parse_pdf.invoke({"pdf_path": path, "use_ocr": False}) for path in pdf_paths]
+
+
+def _pdf_workers() -> int:
+    return min(settings.PDF_PARSE_CONCURRENCY, os.cpu_count() or 1)
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Return the shared PDF worker pool, starting it on first use"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Never fork: this runs on a LangGraph executor thread while other threads
+            # (email extraction, module prefetch) are live, and a forked child can deadlock
+            _pdf_pool = ProcessPoolExecutor(max_workers=_pdf_workers(), mp_context=_pdf_pool_context())
+        return _pdf_pool
+
+
+def _discard_pdf_pool() -> None:
+    """Shut down a failed pool so the next large scan starts a fresh one"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        pool, _pdf_pool = _pdf_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _pdf_pool_context():
+    """forkserver where available (Linux, macOS), spawn otherwise (Windows)"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+@idempotent("pdf_processor")
 def pdf_processor_node(state: AgentState) -> AgentState:
     print(f"\n📄 PDF PROCESSOR: Processing attachments...")
-    downloaded_files = state.get("downloaded_files", [])
+    pdf_paths = [path for path in state.get("downloaded_files", []) if path.lower().endswith(_PARSEABLE_EXTENSIONS)]
     parse_results = []
     
-    for pdf_path in downloaded_files:
-        if pdf_path.endswith('.pdf'):
-            result = parse_pdf.invoke({"pdf_path": pdf_path, "use_ocr": False})
-            if result.get("success"):
-                parse_results.append(result)
-            else:
-                state["errors"].append(f"Failed parsing {os.path.basename(pdf_path)}")
+    for pdf_path, result in zip(pdf_paths, _parse_pdfs(pdf_paths)):
+        if result.get("success"):
+            parse_results.append(result)
+        else:
+            state.setdefault("errors", []).append(f"Failed parsing {os.path.basename(pdf_path)}")
     
     state["pdf_parse_results"] = parse_results
-    state["completed_steps"] = state.get("completed_steps", []) + ["pdf_processor"]
+    _complete_step(state, "pdf_processor")
     print(f"   Processed {len(parse_results)} PDFs")
     return state
 
 
+def _extract_concurrently(jobs, extraction_type: str) -> list:
+    """
+    Run extract_data over (text, extra_fields) jobs on a thread pool.
+    
+    Each call is an OpenAI round-trip, so they overlap; at most
+    settings.LLM_CONCURRENCY run at once. Identical texts (the same statement
+    attached twice) are extracted once and each job gets its own copy.
+    Results keep the input order.
+    """
+    if not jobs:
+        return []
+    
+    unique_texts = {}
+    job_keys = []
+    for text, _ in jobs:
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        unique_texts.setdefault(key, text)
+        job_keys.append(key)
+    
+    def extract(text):
+        result = extract_data.invoke({"text": text, "extraction_type": extraction_type})
+        return result["extracted_data"] if result.get("success") else None
+    
+    with ThreadPoolExecutor(max_workers=min(settings.LLM_CONCURRENCY, len(unique_texts))) as pool:
+        extracted = dict(zip(unique_texts, pool.map(extract, unique_texts.values())))
+    
+    items = []
+    for key, (_, extra_fields) in zip(job_keys, jobs):
+        if extracted[key] is not None:
+            data = copy.deepcopy(extracted[key])
+            data.update(extra_fields)
+            items.append(data)
+    return items
+
+
+# Above this many emails, bodies are extracted several per LLM call: at most
+# EMAIL_EXTRACTION_BATCH bodies and EMAIL_BATCH_MAX_CHARS of body text per call.
+# Bodies are never truncated; one longer than the budget gets its own call.
+EMAIL_BATCH_THRESHOLD = 5
+EMAIL_EXTRACTION_BATCH = 10
+EMAIL_BATCH_MAX_CHARS = 24000
+
+
+def _email_batches(emails: list) -> tuple:
+    """Split emails into (chunks within the prompt budget, emails too long to batch)"""
+    chunks, oversized = [], []
+    chunk, chunk_chars = [], 0
+    for email in emails:
+        body_chars = len(email["body"])
+        if body_chars > EMAIL_BATCH_MAX_CHARS:
+            oversized.append(email)
+            continue
+        if chunk and (len(chunk) == EMAIL_EXTRACTION_BATCH or chunk_chars + body_chars > EMAIL_BATCH_MAX_CHARS):
+            chunks.append(chunk)
+            chunk, chunk_chars = [], 0
+        chunk.append(email)
+        chunk_chars += body_chars
+    if chunk:
+        chunks.append(chunk)
+    return chunks, oversized
+
+
+def _email_fields(email: Dict) -> Dict:
+    return {"source": f"Email: {email['subject']}", "email_id": email.get("id")}
+
+
+def _extract_emails_batched(emails: list, extraction_type: str) -> list:
+    """
+    Extract email bodies several per LLM call, with chunks sent concurrently.
+    
+    Emails too long for a batch, and those the batched call didn't return a
+    result for, are extracted one by one.
+    """
+    from src.modules.llm_interface import get_llm_interface
+    
+    llm = get_llm_interface(settings.OPENAI_API_KEY, settings.OPENAI_MODEL)
+    chunks, oversized = _email_batches(emails)
+    
+    chunk_results = []
+    if chunks:
+        with ThreadPoolExecutor(max_workers=min(settings.LLM_CONCURRENCY, len(chunks))) as pool:
+            chunk_results = list(pool.map(
+                lambda chunk: llm.extract_data_batch([email["body"] for email in chunk], extraction_type),
+                chunks
+            ))
+    
+    extracted_items = []
+    retry_jobs = [(email["body"], _email_fields(email)) for email in oversized]
+    for chunk, results in zip(chunks, chunk_results):
+        for email, result in zip(chunk, results):
+            fields = _email_fields(email)
+            if result is None:
+                retry_jobs.append((email["body"], fields))
+            elif result.get("success"):
+                data = result["extracted_data"]
+                data.update(fields)
+                extracted_items.append(data)
+    
+    if retry_jobs:
+        print(f"   Extracting {len(retry_jobs)} emails individually...")
+        extracted_items += _extract_concurrently(retry_jobs, extraction_type)
+    return extracted_items
+
+
+def _pdf_extraction_jobs(pdf_results: list) -> list:
+    """(text, extra_fields) extraction jobs for parsed PDFs with any text"""
+    return [
+        (pdf["extracted_text"], {"source": pdf.get("file_path")})
+        for pdf in pdf_results if pdf.get("extracted_text")
+    ]
+
+
+def _extract_emails(emails: list, extraction_type: str) -> list:
+    """Extract email bodies: one call each for small scans, batched above EMAIL_BATCH_THRESHOLD"""
+    if len(emails) > EMAIL_BATCH_THRESHOLD:
+        return _extract_emails_batched(emails, extraction_type)
+    return _extract_concurrently([(email["body"], _email_fields(email)) for email in emails], extraction_type)
+
+
+@idempotent("data_extractor")
 def data_extractor_node(state: AgentState) -> AgentState:
     print("\n🔍 DATA EXTRACTOR: Extracting structured data...")
     scan_type = state["entities"].get("email_scan_type", "general")
-    extracted_items = []
 
-    # Extract from PDFs first (these still need individual processing)
     pdf_results = state.get("pdf_parse_results", [])
     if pdf_results:
         print(f"   Extracting from {len(pdf_results)} PDFs...")
-        for pdf in pdf_results:
-            if pdf.get("extracted_text"):
-                result = extract_data.invoke({"text": pdf["extracted_text"], "extraction_type": scan_type})
-                if result.get("success"):
-                    data = result["extracted_data"]
-                    data["source"] = pdf.get("file_path")
-                    extracted_items.append(data)
-
-    # Extract from email bodies - use batch processing if many emails
-    if state.get("email_scan_results"):
-        emails = state["email_scan_results"].get("results", [])
-        if emails:
-            print(f"   Extracting from {len(emails)} email bodies...")
-
-            # For small batches, use individual extraction
-            # For larger batches, batch is already done in email_scanner with filtering
-            # Here we just do final extraction on already-relevant emails
-            if len(emails) <= 5:
-                # Small batch - individual extraction
-                for email in emails:
-                    result = extract_data.invoke({"text": email["body"], "extraction_type": scan_type})
-                    if result.get("success"):
-                        data = result["extracted_data"]
-                        data["source"] = f"Email: {email['subject']}"
-                        data["email_id"] = email.get("id")
-                        extracted_items.append(data)
-            else:
-                # Larger batch - batch all email bodies into fewer LLM calls
-                from src.modules.llm_interface import LLMInterface
-                llm = LLMInterface(settings.OPENAI_API_KEY, settings.OPENAI_MODEL)
-
-                # Process in batches of 5 for extraction
-                batch_size = 5
-                for i in range(0, len(emails), batch_size):
-                    batch = emails[i:i + batch_size]
-                    for email in batch:
-                        result = llm.extract_data(email["body"], scan_type)
-                        if result.get("success"):
-                            data = result["extracted_data"]
-                            data["source"] = f"Email: {email['subject']}"
-                            data["email_id"] = email.get("id")
-                            extracted_items.append(data)
+
+    # Emails reaching here already passed relevance filtering in email_scanner
+    emails = (state.get("email_scan_results") or {}).get("results", [])
+    if emails:
+        print(f"   Extracting from {len(emails)} email bodies...")
+
+    # Email extraction doesn't wait on the PDF calls, so overlap them
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        email_items = pool.submit(_extract_emails, emails, scan_type)
+        extracted_items = _extract_concurrently(_pdf_extraction_jobs(pdf_results), scan_type)
+        extracted_items += email_items.result()
 
     state["extracted_bills"] = extracted_items
-    state["completed_steps"] = state.get("completed_steps", []) + ["data_extractor"]
+    _complete_step(state, "data_extractor")
     print(f"   ✅ Extracted {len(extracted_items)} items")
     return state
 
 
+# Raw PDF text shorter than this is only indexed when it adds to the extracted item
+PDF_INDEX_MIN_CHARS = 200
+PDF_INDEX_MAX_OVERLAP = 0.7
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _pdf_text_redundant(pdf_text: str, bill_text: Optional[str]) -> bool:
+    """True when a short PDF's tokens mostly repeat its extracted item's text (Jaccard)"""
+    if not bill_text or len(pdf_text) >= PDF_INDEX_MIN_CHARS:
+        return False
+    pdf_tokens = frozenset(_TOKEN_RE.findall(pdf_text.lower()))
+    bill_tokens = frozenset(_TOKEN_RE.findall(bill_text.lower()))
+    union = pdf_tokens | bill_tokens
+    return bool(union) and len(pdf_tokens & bill_tokens) / len(union) >= PDF_INDEX_MAX_OVERLAP
+
+
+def _bill_metadata(bill: Dict) -> Dict:
+    """Chroma metadata for an extracted item: None dropped, non-scalars stringified"""
+    return {
+        key: value if isinstance(value, (str, int, float, bool)) else str(value)
+        for key, value in bill.items() if value is not None
+    }
+
+# Searchable text for an indexed email: sender, subject, date, category, summary, body
+_EMAIL_DOC_TMPL = (
+    "\nEMAIL DOCUMENT\n==============\n"
+    "From: {0}\nSubject: {1}\nDate: {2}\nCategory: {3}\n\n"
+    "Summary: {4}\n\nBody:\n{5}\n"
+)
+
+
+@idempotent("database_saver")
 def database_saver_node(state: AgentState) -> AgentState:
     print("\n💾 DATABASE SAVER: Indexing to Vector DB...")
     saved_ids = []
@@ -217,78 +601,107 @@ def database_saver_node(state: AgentState) -> AgentState:
     print(f"   Extracted bills to save: {len(extracted_bills)}")
     print(f"   Email scan results available: {bool(email_scan_results)}")
 
-    # Save extracted structured data
-    for item in extracted_bills:
-        result = save_bill.invoke({"bill_data": item})
-        if result.get("success"):
-            saved_ids.append(result.get("document_id", "unknown"))
-        else:
-            print(f"   ⚠️ Failed to save bill: {result.get('error', 'Unknown error')}")
+    # Extracted items, emails and raw PDF text are indexed in one batched write
+    texts = [bill_document_text(bill) for bill in extracted_bills]
+    # A single bad metadata value would now fail the whole batch, so sanitize
+    metadatas = [_bill_metadata(bill) for bill in extracted_bills]
 
     # CRITICAL: Save STRUCTURED email metadata to Vector DB
+    emails = []
     if email_scan_results:
         emails = email_scan_results.get("results", [])
         print(f"   Indexing {len(emails)} emails with structured metadata...")
         
         for email in emails:
+            sender = email.get("sender", "")
+            subject = email.get("subject", "")
+            body_excerpt = (email.get("body") or "")[:1000]
+            
             # Create structured JSON for each email
             email_doc = {
                 "type": "email",
                 "category": scan_type,
-                "sender": email.get("sender", ""),
-                "subject": email.get("subject", ""),
+                "sender": sender,
+                "subject": subject,
                 "date": email.get("date", ""),
-                "body_preview": email.get("body", "")[:500],
-                "summary": f"Email from {email.get('sender', '')} about {email.get('subject', '')}",
-                "has_attachments": len(email.get("attachments", [])) > 0
+                "body_preview": body_excerpt[:500],
+                "summary": f"Email from {sender} about {subject}",
+                "has_attachments": bool(email.get("attachments"))
             }
             
             # Create searchable text content
-            text_content = f"""
-EMAIL DOCUMENT
-==============
-From: {email_doc['sender']}
-Subject: {email_doc['subject']}
-Date: {email_doc['date']}
-Category: {email_doc['category']}
-
-Summary: {email_doc['summary']}
-
-Body:
-{email.get('body', '')[:1000]}
-"""
-            
-            # Save to vector DB
-            result = add_to_rag.invoke({
-                "text": text_content,
-                "metadata": email_doc
-            })
-
-            if result.get("success"):
-                saved_ids.append(result.get("document_id", ""))
-                print(f"   ✓ Indexed: {email.get('subject', '')[:50]}")
-            else:
-                print(f"   ⚠️ Failed to index email: {result.get('error', 'Unknown error')}")
+            text_content = _EMAIL_DOC_TMPL.format(
+                sender, subject, email_doc["date"], scan_type, email_doc["summary"], body_excerpt
+            )
+            texts.append(text_content)
+            metadatas.append(email_doc)
     
-    # Save raw PDF content
+    # Save raw PDF content, unless it's a short receipt its extracted item already covers
+    bill_text_by_source = {
+        bill.get("source"): text for bill, text in zip(extracted_bills, texts)
+    }
     for pdf in state.get("pdf_parse_results", []):
         if pdf.get("extracted_text"):
-            add_to_rag.invoke({
-                "text": pdf["extracted_text"],
-                "metadata": {"type": "pdf", "path": pdf.get("file_path")}
-            })
+            if _pdf_text_redundant(pdf["extracted_text"], bill_text_by_source.get(pdf.get("file_path"))):
+                continue
+            texts.append(pdf["extracted_text"])
+            # Chroma rejects None metadata values, which would now fail the whole batch
+            metadatas.append({"type": "pdf", "path": pdf.get("file_path") or ""})
+    
+    if texts:
+        result = add_to_rag_batch.invoke({"texts": texts, "metadatas": metadatas})
+        if result.get("success"):
+            # Extracted items and emails count towards saved ids, raw PDFs don't
+            saved_ids += result.get("document_ids", [])[:len(extracted_bills) + len(emails)]
+            for email in emails:
+                print(f"   ✓ Indexed: {email.get('subject', '')[:50]}")
+        else:
+            print(f"   ⚠️ Failed to index documents: {result.get('error', 'Unknown error')}")
 
     state["saved_bill_ids"] = saved_ids
-    state["completed_steps"] = state.get("completed_steps", []) + ["database_saver"]
+    _complete_step(state, "database_saver")
     print(f"   ✅ Total indexed: {len(saved_ids)} documents")
     return state
 
 
+@idempotent("document_pipeline")
+def document_pipeline_node(state: AgentState) -> AgentState:
+    """
+    Parse, extract and save a scan's documents in one graph step.
+    
+    Email bodies are already known after the scan, so their extraction runs
+    while the attachments are still being parsed; the PDF extractions follow
+    as soon as parsing finishes. Each stage is recorded as completed as usual.
+    """
+    print(f"\n🧩 DOCUMENT PIPELINE: parse → extract → save")
+    scan_type = state["entities"].get("email_scan_type", "general")
+    emails = (state.get("email_scan_results") or {}).get("results", [])
+    
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        email_items = pool.submit(_extract_emails, emails, scan_type)
+        pdf_processor_node(state)
+        
+        pdf_results = state.get("pdf_parse_results", [])
+        print(f"\n🔍 DATA EXTRACTOR: {len(pdf_results)} PDFs, {len(emails)} email bodies...")
+        extracted_items = _extract_concurrently(_pdf_extraction_jobs(pdf_results), scan_type)
+        extracted_items += email_items.result()
+    
+    state["extracted_bills"] = extracted_items
+    _complete_step(state, "data_extractor")
+    print(f"   ✅ Extracted {len(extracted_items)} items")
+    
+    database_saver_node(state)
+    _complete_step(state, "document_pipeline")
+    return state
+
+
+@idempotent("rag_indexer")
 def rag_indexer_node(state: AgentState) -> AgentState:
-    state["completed_steps"] = state.get("completed_steps", []) + ["rag_indexer"]
+    _complete_step(state, "rag_indexer")
     return state
 
 
+@idempotent("rag_retriever")
 def rag_retriever_node(state: AgentState) -> AgentState:
     print(f"\n🔎 RAG RETRIEVER: Searching Vector DB...")
     print(f"   Query: {state['user_query']}")
@@ -328,30 +741,75 @@ def rag_retriever_node(state: AgentState) -> AgentState:
         import traceback
         traceback.print_exc()
         state["retrieved_documents"] = []
-        state["errors"] = state.get("errors", []) + [f"RAG retriever error: {str(e)}"]
+        state.setdefault("errors", []).append(f"RAG retriever error: {str(e)}")
     
-    state["completed_steps"] = state.get("completed_steps", []) + ["rag_retriever"]
+    _complete_step(state, "rag_retriever")
     return state
 
 
+@idempotent("database_query")
 def database_query_node(state: AgentState) -> AgentState:
     print(f"\n🔎 DATABASE QUERY: Searching...")
     res = query_database.invoke({"query_type": "upcoming"}) 
     if res.get("success"):
         state["database_results"] = res
-    state["completed_steps"] = state.get("completed_steps", []) + ["database_query"]
+    _complete_step(state, "database_query")
     return state
 
 
+@idempotent("web_searcher")
 def web_searcher_node(state: AgentState) -> AgentState:
     print(f"\n🌐 WEB SEARCHER: Searching...")
     res = web_search.invoke({"query": state["user_query"]})
     if res.get("success"):
         state["web_search_results"] = res.get("results", [])
-    state["completed_steps"] = state.get("completed_steps", []) + ["web_searcher"]
+    _complete_step(state, "web_searcher")
     return state
 
 
+def _run_steps_concurrently(state: AgentState, step_nodes: Dict) -> None:
+    """
+    Run independent worker nodes side by side and merge their results into state.
+    
+    Each node gets its own shallow copy of the state, so the steps must not
+    read each other's output. Fields a node reassigned are copied back, new
+    errors are appended, and each step is recorded as completed.
+    """
+    bookkeeping = ("completed_steps", "plan_cursor", "errors")
+    
+    def branch_state():
+        # Own copies of the lists nodes append to in place
+        branch = dict(state)
+        branch["completed_steps"] = list(state.get("completed_steps", []))
+        branch["errors"] = list(state.get("errors", []))
+        return branch
+    
+    with ThreadPoolExecutor(max_workers=len(step_nodes)) as pool:
+        branches = list(pool.map(lambda node: node(branch_state()), step_nodes.values()))
+    
+    errors = state.setdefault("errors", [])
+    base_error_count = len(errors)
+    for step, branch in zip(step_nodes, branches):
+        for key, value in branch.items():
+            if key not in bookkeeping and value is not state.get(key):
+                state[key] = value
+        errors.extend(branch.get("errors", [])[base_error_count:])
+        state.setdefault("completed_steps", []).append(step)
+
+
+@idempotent("parallel_lookup")
+def parallel_lookup_node(state: AgentState) -> AgentState:
+    """Fetch stored bills and web results at once; neither depends on the other"""
+    print(f"\n🔀 PARALLEL LOOKUP: database_query ∥ web_searcher")
+    _run_steps_concurrently(state, {
+        "database_query": database_query_node,
+        "web_searcher": web_searcher_node
+    })
+    _complete_step(state, "parallel_lookup")
+    return state
+
+
+@idempotent("reminder_creator")
 def reminder_creator_node(state: AgentState) -> AgentState:
     """Create and store reminders for bills with due dates"""
     print("\n⏰ REMINDER CREATOR: Setting up reminders...")
@@ -426,13 +884,14 @@ def reminder_creator_node(state: AgentState) -> AgentState:
 
     except Exception as e:
         print(f"   ❌ Error creating reminders: {e}")
-        state["errors"] = state.get("errors", []) + [f"Reminder creation error: {str(e)}"]
+        state.setdefault("errors", []).append(f"Reminder creation error: {str(e)}")
         state["reminders_created"] = []
 
-    state["completed_steps"] = state.get("completed_steps", []) + ["reminder_creator"]
+    _complete_step(state, "reminder_creator")
     return state
 
 
+@idempotent("response_generator")
 def response_generator_node(state: AgentState) -> AgentState:
     print(f"\n💬 RESPONSE GENERATOR: Crafting response...")
 
@@ -442,8 +901,8 @@ def response_generator_node(state: AgentState) -> AgentState:
             error_msg = "OPENAI_API_KEY not set in environment"
             print(f"   ❌ {error_msg}")
             state["final_response"] = f"Configuration error: {error_msg}"
-            state["errors"] = state.get("errors", []) + [error_msg]
-            state["completed_steps"] = state.get("completed_steps", []) + ["response_generator"]
+            state.setdefault("errors", []).append(error_msg)
+            _complete_step(state, "response_generator")
             return state
 
         # Format retrieved documents to be serializable
@@ -472,7 +931,8 @@ def response_generator_node(state: AgentState) -> AgentState:
         print(f"   Using model: {settings.OPENAI_MODEL}")
 
         # Use OpenAI
-        llm = LLMInterface(settings.OPENAI_API_KEY, settings.OPENAI_MODEL)
+        from src.modules.llm_interface import get_llm_interface
+        llm = get_llm_interface(settings.OPENAI_API_KEY, settings.OPENAI_MODEL)
         result = llm.generate_response(state["user_query"], context)
 
         if result.get("success"):
@@ -486,19 +946,35 @@ def response_generator_node(state: AgentState) -> AgentState:
             error_msg = result.get("error", "Unknown error")
             print(f"   ❌ LLM Error: {error_msg}")
             state["final_response"] = f"I found the documents but couldn't generate a response. Error: {error_msg}"
-            state["errors"] = state.get("errors", []) + [f"Response generation failed: {error_msg}"]
+            state.setdefault("errors", []).append(f"Response generation failed: {error_msg}")
 
     except Exception as e:
         print(f"   ❌ Exception in response generator: {e}")
         import traceback
         traceback.print_exc()
         state["final_response"] = f"Error generating response: {str(e)}"
-        state["errors"] = state.get("errors", []) + [f"Response generator exception: {str(e)}"]
+        state.setdefault("errors", []).append(f"Response generator exception: {str(e)}")
 
-    state["completed_steps"] = state.get("completed_steps", []) + ["response_generator"]
+    _complete_step(state, "response_generator")
     return state
 
 
+# Responses matching any of these phrases are not forwarded to WhatsApp/Telegram
+_NO_RESULT_PHRASES = (
+    "no results found",
+    "couldn't find any",
+    "could not find",
+    "no matching",
+    "no documents found",
+    "no emails found",
+    "no bills found",
+    "unable to find",
+    "i don't have any",
+    "no information available"
+)
+_NO_RESULT_RE = re.compile("|".join(map(re.escape, _NO_RESULT_PHRASES)), re.IGNORECASE)
+
+
 def _send_response_to_whatsapp(state: AgentState, response_text: str) -> None:
     """
     Send the AI response to WhatsApp if:
@@ -509,8 +985,6 @@ def _send_response_to_whatsapp(state: AgentState, response_text: str) -> None:
         state: Current agent state
         response_text: The generated response to potentially send
     """
-    from src.modules.reminder_system import ReminderSystem
-
     print(f"   📱 Checking WhatsApp notification...")
 
     # Check if WhatsApp notification is enabled
@@ -521,6 +995,15 @@ def _send_response_to_whatsapp(state: AgentState, response_text: str) -> None:
         print(f"   📱 Skipping: Channel '{notification_channel}' is not whatsapp/telegram")
         return
 
+    # Nothing can be delivered without credentials, so don't build the client at all
+    if notification_channel == "whatsapp":
+        configured = settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN and settings.TWILIO_WHATSAPP_FROM
+    else:
+        configured = settings.TELEGRAM_BOT_TOKEN and settings.TELEGRAM_CHAT_ID
+    if not configured:
+        print(f"   📱 Skipping: {notification_channel.title()} credentials are not configured")
+        return
+
     # Check if we have any actual results to send
     has_results = False
 
@@ -563,24 +1046,11 @@ def _send_response_to_whatsapp(state: AgentState, response_text: str) -> None:
         return
 
     # Check for "no results" type responses
-    no_result_phrases = [
-        "no results found",
-        "couldn't find any",
-        "could not find",
-        "no matching",
-        "no documents found",
-        "no emails found",
-        "no bills found",
-        "unable to find",
-        "i don't have any",
-        "no information available"
-    ]
+    if _NO_RESULT_RE.search(response_text):
+        print("   📱 Skipping WhatsApp: Response indicates no results")
+        return
 
-    response_lower = response_text.lower()
-    for phrase in no_result_phrases:
-        if phrase in response_lower:
-            print("   📱 Skipping WhatsApp: Response indicates no results")
-            return
+    from src.modules.reminder_system import ReminderSystem
 
     # Initialize ReminderSystem with WhatsApp credentials
     try:
@@ -642,8 +1112,5 @@ def route_after_plan(state: AgentState) -> str:
 
 def should_continue(state: AgentState) -> str:
     plan = state["plan"]
-    completed = state["completed_steps"]
-    for step in plan:
-        if step not in completed:
-            return step
-    return "end"
\ No newline at end of file
+    cursor = state.get("plan_cursor", 0)
+    return plan[cursor] if cursor < len(plan) else "end"
\ No newline at end of file
@@ -1,5 +1,4 @@
-from typing import TypedDict, List, Dict, Optional, Annotated
-from operator import add
+from typing import TypedDict, List, Dict, Optional
 from datetime import datetime
 
 
@@ -16,6 +15,7 @@ class AgentState(TypedDict):
     intent_confidence: float
     entities: Dict  
     plan: List[str]
+    plan_cursor: int  # Index of the next plan step to run
     
     # Email Processing
     email_scan_results: Optional[Dict]
@@ -48,9 +48,11 @@ class AgentState(TypedDict):
     
     # Execution Tracking
     current_step: int
-    completed_steps: Annotated[List[str], add]  
-    tools_used: Annotated[List[str], add]  
-    errors: Annotated[List[str], add]
+    # Appended in place by the nodes. Every node returns the whole state, so an
+    # `add` reducer here would re-concatenate the full list on each step.
+    completed_steps: List[str]
+    tools_used: List[str]
+    errors: List[str]
     
     # Response Generation
     context_for_llm: Dict
@@ -62,6 +64,8 @@ class AgentState(TypedDict):
     execution_start_time: float
     requires_human_input: bool
     human_feedback: Optional[str]
+    use_cache: bool  # False forces fresh LLM calls (--no-cache)
+    force_rerun: bool  # Run nodes even if their step is already in completed_steps
 
 
 class BillData(TypedDict):
@@ -97,60 +101,78 @@ class RAGResult(TypedDict):
     score: float
 
 
-def create_initial_state(user_query: str, user_id: str = "default") -> AgentState:
+# Defaults shared by every run. Mutable values here are never handed out
+# directly: create_initial_state() gives each run fresh containers.
+_INITIAL_STATE_PROTOTYPE = {
+    # Intent & Planning
+    "intent": None,
+    "intent_confidence": 0.0,
+    "entities": {},
+    "plan": [],
+    "plan_cursor": 0,
+    
+    # Module Results
+    "email_scan_results": None,
+    "downloaded_files": [],
+    "pdf_parse_results": [],
+    "extracted_bills": [],
+    "database_results": None,
+    "saved_bill_ids": [],
+    "rag_query": None,
+    "retrieved_documents": [],
+    "relevance_scores": [],
+    "web_search_results": [],
+    "alternatives_found": [],
+    "llm_extractions": [],
+    "llm_responses": [],
+    "reminders_created": [],
+    "reminders_sent": 0,
+    
+    # Execution Tracking
+    "current_step": 0,
+    "completed_steps": [],
+    "tools_used": [],
+    "errors": [],
+    
+    # Response
+    "context_for_llm": {},
+    "final_response": "",
+    
+    # Metadata
+    "retry_count": 0,
+    "max_retries": 3,
+    "requires_human_input": False,
+    "human_feedback": None,
+    "use_cache": True,
+    "force_rerun": False
+}
+
+_MUTABLE_STATE_KEYS = tuple(
+    key for key, value in _INITIAL_STATE_PROTOTYPE.items() if isinstance(value, (list, dict))
+)
+
+
+def create_initial_state(user_query: str, user_id: str = "default", use_cache: bool = True) -> AgentState:
     """
     Create initial state for agent execution
     
     Args:
         user_query: User's input query
         user_id: User identifier
+        use_cache: Whether cached intent classifications may be reused
         
     Returns:
         AgentState: Initial state
     """
-    return {
-        # User Input
-        "user_query": user_query,
-        "user_id": user_id,
-        "session_id": f"{user_id}_{int(datetime.now().timestamp())}",
-        
-        # Intent & Planning
-        "intent": None,
-        "intent_confidence": 0.0,
-        "entities": {},
-        "plan": [],
-        
-        # Module Results
-        "email_scan_results": None,
-        "downloaded_files": [],
-        "pdf_parse_results": [],
-        "extracted_bills": [],
-        "database_results": None,
-        "saved_bill_ids": [],
-        "rag_query": None,
-        "retrieved_documents": [],
-        "relevance_scores": [],
-        "web_search_results": [],
-        "alternatives_found": [],
-        "llm_extractions": [],
-        "llm_responses": [],
-        "reminders_created": [],
-        "reminders_sent": 0,
-        
-        # Execution Tracking
-        "current_step": 0,
-        "completed_steps": [],
-        "tools_used": [],
-        "errors": [],
-        
-        # Response
-        "context_for_llm": {},
-        "final_response": "",
-        
-        # Metadata
-        "retry_count": 0,
-        "max_retries": 3,
-        "execution_start_time": datetime.now().timestamp(),
-        "requires_human_input": False,
-        "human_feedback": None
-    }
\ No newline at end of file
+    now = datetime.now().timestamp()
+    state = _INITIAL_STATE_PROTOTYPE.copy()
+    for key in _MUTABLE_STATE_KEYS:
+        state[key] = type(state[key])()
+    
+    # User Input
+    state["user_query"] = user_query
+    state["user_id"] = user_id
+    state["session_id"] = f"{user_id}_{int(now)}"
+    state["execution_start_time"] = now
+    state["use_cache"] = use_cache
+    return state
@@ -1,6 +1,5 @@
 from langchain.tools import BaseTool, tool
 from typing import Optional, List, Dict, Any
-from src.modules.email_scanner import scan_emails as _scan_emails_impl
 from src.config.settings import settings
 
 
@@ -37,6 +36,8 @@ def scan_emails(
         Dict: A dictionary containing 'success' status, counts, 'filtered_log' with reasons for filtered emails,
             and a list of 'results' (emails with body, sender, and attachment paths).
     """
+    from src.modules.email_scanner import scan_emails as _scan_emails_impl
+    
     return _scan_emails_impl(
         date_from=date_from,
         date_to=date_to,
@@ -102,13 +103,10 @@ def extract_data(text: str, extraction_type: str = "bills") -> Dict[str, Any]:
         Dict: Contains 'success' status and an 'extracted_data' dictionary with fields 
             matching the requested type.
     """
-    from src.modules.llm_interface import LLMInterface
+    from src.modules.llm_interface import get_llm_interface
     
     try:
-        llm = LLMInterface(
-            api_key=settings.OPENAI_API_KEY,
-            model=settings.OPENAI_MODEL
-        )
+        llm = get_llm_interface(settings.OPENAI_API_KEY, settings.OPENAI_MODEL)
         
         result = llm.extract_data(text=text, extraction_type=extraction_type)
         return result
@@ -131,13 +129,10 @@ def classify_intent(user_query: str) -> Dict[str, Any]:
     Returns:
         Dict: Contains 'intent', 'confidence', and 'entities' (e.g., scan_type, dates).
     """
-    from src.modules.llm_interface import LLMInterface
+    from src.modules.llm_interface import get_llm_interface
     
     try:
-        llm = LLMInterface(
-            api_key=settings.OPENAI_API_KEY,
-            model=settings.OPENAI_MODEL
-        )
+        llm = get_llm_interface(settings.OPENAI_API_KEY, settings.OPENAI_MODEL)
         
         result = llm.classify_intent(user_query=user_query)
         return result
@@ -145,6 +140,14 @@ def classify_intent(user_query: str) -> Dict[str, Any]:
         return {"success": False, "error": str(e), "intent": "unknown"}
 
 
+def bill_document_text(bill_data: Dict[str, Any]) -> str:
+    """Searchable text stored in the vector store for an extracted item"""
+    type_label = bill_data.get('type', 'Document')
+    lines = [f"--- {type_label} Data ---"]
+    lines += [f"{key}: {value}" for key, value in bill_data.items() if value]
+    return "\n".join(lines) + "\n"
+
+
 @tool
 def save_bill(bill_data: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -160,19 +163,11 @@ def save_bill(bill_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dict: Contains 'success' status and the generated 'document_id'.
     """
-    from src.modules.rag_system import RAGSystem
+    from src.modules.rag_system import get_rag_system
     
     try:
-        rag = RAGSystem(settings.VOYAGE_API_KEY, settings.VECTOR_STORE_PATH)
-        
-        type_label = bill_data.get('type', 'Document')
-        text_content = f"--- {type_label} Data ---\n"
-        
-        for key, value in bill_data.items():
-            if value:
-                text_content += f"{key}: {value}\n"
-        
-        return rag.add_document(text=text_content, metadata=bill_data)
+        rag = get_rag_system(settings.VOYAGE_API_KEY, settings.VECTOR_STORE_PATH)
+        return rag.add_document(text=bill_document_text(bill_data), metadata=bill_data)
         
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -194,10 +189,10 @@ def query_database(query_type: str, filters: Dict = {}, days: int = 7) -> Dict[s
     Returns:
         Dict: Contains 'success' status and a list of 'results' (documents found).
     """
-    from src.modules.rag_system import RAGSystem
+    from src.modules.rag_system import get_rag_system
     
     try:
-        rag = RAGSystem(settings.VOYAGE_API_KEY, settings.VECTOR_STORE_PATH)
+        rag = get_rag_system(settings.VOYAGE_API_KEY, settings.VECTOR_STORE_PATH)
         
         search_query = ""
         
@@ -236,10 +231,10 @@ def rag_search(query: str, filters: Optional[Dict] = None, top_k: int = 5) -> Di
     Returns:
         Dict: Contains 'success' status and 'results' (list of relevant documents).
     """
-    from src.modules.rag_system import RAGSystem
+    from src.modules.rag_system import get_rag_system
     
     try:
-        rag = RAGSystem(settings.VOYAGE_API_KEY, settings.VECTOR_STORE_PATH)
+        rag = get_rag_system(settings.VOYAGE_API_KEY, settings.VECTOR_STORE_PATH)
         return rag.search(query=query, filters=filters, top_k=top_k)
     except Exception as e:
         return {"success": False, "error": str(e), "results": []}
@@ -261,15 +256,39 @@ def add_to_rag(text: str, metadata: Dict, doc_id: Optional[str] = None) -> Dict[
     Returns:
         Dict: Contains 'success' status and 'document_id'.
     """
-    from src.modules.rag_system import RAGSystem
+    from src.modules.rag_system import get_rag_system
     
     try:
-        rag = RAGSystem(settings.VOYAGE_API_KEY, settings.VECTOR_STORE_PATH)
+        rag = get_rag_system(settings.VOYAGE_API_KEY, settings.VECTOR_STORE_PATH)
         return rag.add_document(text=text, metadata=metadata, doc_id=doc_id)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+@tool
+def add_to_rag_batch(texts: List[str], metadatas: List[Dict]) -> Dict[str, Any]:
+    """
+    Adds several text blocks to the RAG Vector Store in one batched write.
+
+    Use this instead of repeated add_to_rag calls when indexing many emails or
+    PDFs at once: embeddings are requested in bulk and stored in a single insert.
+
+    Args:
+        texts (List[str]): The contents to index.
+        metadatas (List[Dict]): Structured data for each text, in the same order.
+
+    Returns:
+        Dict: Contains 'success' status and 'document_ids' in input order.
+    """
+    from src.modules.rag_system import get_rag_system
+    
+    try:
+        rag = get_rag_system(settings.VOYAGE_API_KEY, settings.VECTOR_STORE_PATH)
+        return rag.add_documents(texts=texts, metadatas=metadatas)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 @tool
 def web_search(query: str, search_type: str = "general", max_results: int = 5) -> Dict[str, Any]:
     """
@@ -375,6 +394,7 @@ def get_all_tools() -> List[BaseTool]:
         save_bill,
         rag_search,
         add_to_rag,
+        add_to_rag_batch,
         web_search,
         find_alternatives,
         create_reminder,
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 class EmailScanConfig:
     
@@ -189,6 +189,10 @@ class EmailScanConfig:
         "banking": ["bank", "banking", "statement", "statements"]
     }
     
+    # EMAIL_TYPES is static, so derived views are computed once
+    _all_types: Optional[Tuple[str, ...]] = None
+    _summary_cache: Optional[str] = None
+    
     TIME_PATTERNS = {
         "today": 1,
         "yesterday": 2,
@@ -207,7 +211,9 @@ class EmailScanConfig:
     
     @classmethod
     def get_all_types(cls) -> List[str]:
-        return list(cls.EMAIL_TYPES.keys())
+        if cls._all_types is None:
+            cls._all_types = tuple(cls.EMAIL_TYPES.keys())
+        return list(cls._all_types)
     
     @classmethod
     def get_type_names(cls) -> Dict[str, str]:
@@ -247,11 +253,15 @@ class EmailScanConfig:
     
     @classmethod
     def get_config_summary(cls) -> str:
+        if cls._summary_cache is not None:
+            return cls._summary_cache
+        
         summary = "\n📧 Email Scan Types Available:\n\n"
         for key, config in cls.EMAIL_TYPES.items():
             summary += f"  {key:15} - {config['name']}\n"
             summary += f"  {'':15}   {config['description']}\n"
             summary += f"  {'':15}   Default: {config['default_days']} days\n\n"
+        cls._summary_cache = summary
         return summary
     
     @classmethod
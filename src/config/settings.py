@@ -4,10 +4,25 @@ from pathlib import Path
 import yaml
 from typing import Optional, Dict, Tuple
 from datetime import datetime, timedelta
+from functools import lru_cache
+import copy
 import getpass
 
+try:
+    from yaml import CSafeLoader as _YamlLoader  # libyaml-backed parser
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 load_dotenv()
 
+
+@lru_cache(maxsize=8)
+def _parse_yaml_file(path: str, mtime_ns: int) -> Dict:
+    """Parse a YAML file; cached per (path, mtime) so unchanged files are parsed once"""
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=_YamlLoader) or {}
+
+
 class Settings:
     """
     Multi-source configuration management.
@@ -23,6 +38,8 @@ class Settings:
     _config_file = None
     _config_data: Dict = {}
     _session_keys: Dict[str, str] = {}  # Runtime API keys
+    _api_key_cache: Dict[str, str] = {}  # Resolved API keys, cleared when a source changes
+    _summary_cache: Optional[str] = None  # Rendered get_config_summary() output
     _debug = os.getenv("CONFIG_DEBUG", "false").lower() == "true"
     
     @classmethod
@@ -44,16 +61,18 @@ class Settings:
     @classmethod
     def _load_yaml_config(cls):
         """Load configuration from YAML file"""
+        cls._invalidate_caches()
         if not cls._config_file:
             cls._find_config_file()
         
         if cls._config_file and cls._config_file.exists():
             try:
-                with open(cls._config_file, 'r') as f:
-                    cls._config_data = yaml.safe_load(f) or {}
-                    if cls._debug:
-                        print(f"[DEBUG] Loaded config.yaml: {len(cls._config_data)} top-level keys")
-                    return True
+                parsed = _parse_yaml_file(str(cls._config_file), cls._config_file.stat().st_mtime_ns)
+                # Copy so in-place edits (e.g. _update_config_yaml) never touch the cached parse
+                cls._config_data = copy.deepcopy(parsed)
+                if cls._debug:
+                    print(f"[DEBUG] Loaded config.yaml: {len(cls._config_data)} top-level keys")
+                return True
             except Exception as e:
                 print(f"⚠️  Warning: Could not load config.yaml: {e}")
                 cls._config_data = {}
@@ -64,6 +83,12 @@ class Settings:
             cls._config_data = {}
             return False
     
+    @classmethod
+    def _invalidate_caches(cls):
+        """Drop memoized values after a session key, .env or config.yaml change"""
+        cls._api_key_cache.clear()
+        cls._summary_cache = None
+    
     @classmethod
     def _get_config_value(cls, *keys, default=None):
         """Navigate nested config dict safely"""
@@ -81,28 +106,36 @@ class Settings:
     def set_session_api_key(cls, key_name: str, key_value: str):
         """Set API key for current session only"""
         cls._session_keys[key_name] = key_value
+        cls._invalidate_caches()
         print(f"✅ {key_name} set for this session")
     
     @classmethod
     def _get_api_key(cls, env_var: str, config_path: list, key_name: str) -> str:
         """
         Get API key with priority: session > .env > config.yaml
+        
+        Resolved keys are memoized per key name; the cache is cleared whenever
+        a session key, .env or config.yaml is updated through this class.
+        A missing key is not memoized, so one exported later is still found.
         """
+        if key_name in cls._api_key_cache:
+            return cls._api_key_cache[key_name]
+        
         # 1. Check session keys (runtime)
         if key_name in cls._session_keys:
-            return cls._session_keys[key_name]
+            value = cls._session_keys[key_name]
         
         # 2. Check .env
-        env_value = os.getenv(env_var, "")
-        if env_value:
-            return env_value
+        elif os.getenv(env_var, ""):
+            value = os.getenv(env_var, "")
         
         # 3. Check config.yaml
-        config_value = cls._get_config_value(*config_path, default="")
-        if config_value:
-            return config_value
+        else:
+            value = cls._get_config_value(*config_path, default="") or ""
         
-        return ""
+        if value:
+            cls._api_key_cache[key_name] = value
+        return value
     
     @classmethod
     def prompt_for_api_key(cls, key_name: str, key_description: str) -> Optional[str]:
@@ -149,6 +182,7 @@ class Settings:
             print(f"✅ {key_name} added to .env file")
             # Reload .env
             load_dotenv(override=True)
+            cls._invalidate_caches()
         except Exception as e:
             print(f"❌ Failed to write to .env: {e}")
     
@@ -174,6 +208,7 @@ class Settings:
         try:
             with open(cls._config_file, 'w') as f:
                 yaml.dump(cls._config_data, f, default_flow_style=False)
+            cls._invalidate_caches()
             print(f"✅ {key_name} added to config.yaml at {cls._config_file}")
         except Exception as e:
             print(f"❌ Failed to write to config.yaml: {e}")
@@ -351,6 +386,43 @@ class Settings:
     def ENABLE_REMINDERS(self) -> bool:
         return bool(self._get_config_value("features", "enable_reminders", default=True))
 
+    @property
+    def GMAIL_KEYWORD_SEARCH(self) -> bool:
+        """
+        Add the scan-type keywords to the Gmail search query (opt-in).
+        
+        Fewer messages are downloaded, but Gmail matches whole words only, so
+        some emails the local substring filter would keep are never fetched.
+        """
+        env_value = os.getenv("GMAIL_KEYWORD_SEARCH", "")
+        if env_value:
+            return env_value.lower() in ("1", "true", "yes")
+        return bool(self._get_config_value("advanced", "gmail_keyword_search", default=False))
+
+    @property
+    def BATCH_CONCURRENCY(self) -> int:
+        """Maximum number of --batch queries processed at once"""
+        env_value = os.getenv("BATCH_CONCURRENCY", "")
+        if env_value:
+            return max(1, int(env_value))
+        return max(1, int(self._get_config_value("advanced", "batch_concurrency", default=8)))
+
+    @property
+    def LLM_CONCURRENCY(self) -> int:
+        """Maximum number of LLM calls one node keeps in flight"""
+        env_value = os.getenv("LLM_CONCURRENCY", "")
+        if env_value:
+            return max(1, int(env_value))
+        return max(1, int(self._get_config_value("advanced", "llm_concurrency", default=8)))
+
+    @property
+    def PDF_PARSE_CONCURRENCY(self) -> int:
+        """Maximum number of worker processes parsing PDF attachments (also capped at the CPU count)"""
+        env_value = os.getenv("PDF_PARSE_CONCURRENCY", "")
+        if env_value:
+            return max(1, int(env_value))
+        return max(1, int(self._get_config_value("advanced", "pdf_parse_concurrency", default=8)))
+
     # ==================== Notification Configuration ====================
 
     @property
@@ -451,7 +523,10 @@ class Settings:
     
     @classmethod
     def get_config_summary(cls) -> str:
-        """Get a summary of current configuration"""
+        """Get a summary of current configuration (rendered once, cached until config changes)"""
+        if cls._summary_cache is not None:
+            return cls._summary_cache
+        
         instance = cls()
         
         summary = "📋 Bill Tracker Agent Configuration:\n"
@@ -475,6 +550,7 @@ class Settings:
         summary += f"    WhatsApp: {'✅ Configured' if instance.TWILIO_ACCOUNT_SID else '❌ Not configured'}\n"
         summary += "="*60
 
+        cls._summary_cache = summary
         return summary
 
 
@@ -8,7 +8,7 @@ from typing import Dict, Optional
 import re
 from datetime import datetime
 from email.utils import parsedate_to_datetime
-from src.modules.llm_interface import LLMInterface
+from src.modules.llm_interface import get_llm_interface
 from src.config.settings import settings
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
@@ -26,6 +26,38 @@ SCAN_TYPE_KEYWORDS = {
     "tax": ["tax", "1099", "w-2", "w2", "return", "irs", "refund"],
 }
 
+# Words in the user's query that say nothing about which emails are relevant
+QUERY_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'is', 'are', 'was', 'were', 'for', 'from', 'my', 'me', 'i', 'to', 'and', 'or',
+    'in', 'on', 'at', 'of', 'scan', 'check', 'get', 'find', 'search', 'emails', 'email', 'inbox'
+})
+
+
+def gmail_keyword_clause(user_query: str, scan_type: str) -> str:
+    """
+    Gmail search clause approximating quick_keyword_filter on the server side.
+    
+    Returns an OR group ({a b c}) of the scan type and query keywords, plus
+    has:attachment for bill-like types. Empty for scan types the quick filter
+    lets through unconditionally.
+    
+    This is a recall trade-off, not an exact mirror: Gmail matches whole words
+    ("bill" misses "Billing notice", "due" misses "overdue") and the clause
+    can't express the quick filter's "mentions pdf/attachment" rule. Only used
+    when settings.GMAIL_KEYWORD_SEARCH is on.
+    """
+    if scan_type not in SCAN_TYPE_KEYWORDS:
+        return ""
+    
+    terms = dict.fromkeys(SCAN_TYPE_KEYWORDS[scan_type])
+    for word in user_query.lower().split():
+        word = re.sub(r'[^\w-]', '', word)
+        if len(word) > 2 and word not in QUERY_STOP_WORDS:
+            terms[word] = None
+    if scan_type in ["bills", "invoice", "receipts", "orders"]:
+        terms["has:attachment"] = None
+    return "{" + " ".join(terms) + "}"
+
 
 def quick_keyword_filter(email: dict, user_query: str, scan_type: str = "general") -> bool:
     """
@@ -43,11 +75,8 @@ def quick_keyword_filter(email: dict, user_query: str, scan_type: str = "general
 
     combined_text = f"{subject} {sender} {body_preview}"
 
-    # Extract keywords from user query
-    query_words = set(user_query.lower().split())
-    # Remove common words
-    stop_words = {'the', 'a', 'an', 'is', 'are', 'was', 'were', 'for', 'from', 'my', 'me', 'i', 'to', 'and', 'or', 'in', 'on', 'at', 'of', 'scan', 'check', 'get', 'find', 'search', 'emails', 'email', 'inbox'}
-    query_keywords = query_words - stop_words
+    # Extract keywords from user query, minus common words
+    query_keywords = set(user_query.lower().split()) - QUERY_STOP_WORDS
 
     # Check if any query keyword appears in email
     for kw in query_keywords:
@@ -107,7 +136,7 @@ Subject: {subject}
 Body:
 {body[:2500]}"""  # Increased limit for more context
             
-            llm = LLMInterface(settings.OPENAI_API_KEY, settings.OPENAI_MODEL)
+            llm = get_llm_interface(settings.OPENAI_API_KEY, settings.OPENAI_MODEL)
             result = llm.evaluate_relevance(query=user_query, document=email_content)
             
             return {
@@ -205,8 +234,6 @@ Body:
         if user_email:
             query += f' -from:{user_email}'
 
-        print(f"Searching Gmail: {query}")
-
         # Get scan_type for keyword filtering
         scan_type = "general"
         if user_query:
@@ -215,6 +242,16 @@ Body:
                     scan_type = stype
                     break
 
+        # Opt-in: let Gmail drop likely non-matches instead of fetching their full
+        # bodies, at some recall cost; the quick filter below still applies its
+        # substring rules to what comes back
+        if use_filtering and user_query and settings.GMAIL_KEYWORD_SEARCH:
+            keyword_clause = gmail_keyword_clause(user_query, scan_type)
+            if keyword_clause:
+                query += f' {keyword_clause}'
+
+        print(f"Searching Gmail: {query}")
+
         try:
             results = self.service.users().messages().list(userId='me', q=query, maxResults=max_results).execute()
             messages = results.get('messages', [])
@@ -282,7 +319,7 @@ Body:
 
             if use_filtering and user_query and candidates:
                 print(f"   Batch evaluating {len(candidates)} candidates...")
-                llm = LLMInterface(settings.OPENAI_API_KEY, settings.OPENAI_MODEL)
+                llm = get_llm_interface(settings.OPENAI_API_KEY, settings.OPENAI_MODEL)
                 relevance_results = llm.batch_evaluate_relevance(user_query, candidates)
 
                 for email, relevance in zip(candidates, relevance_results):
@@ -1,9 +1,20 @@
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, create_model
 from typing import Dict, Optional, List, Type
+from collections import OrderedDict
+from functools import lru_cache
+import copy
+import hashlib
 import json
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used when it isn't installed
+    orjson = None
 
 
 # --- Data Models ---
@@ -82,6 +93,75 @@ class CombinedEvalExtractResult(BaseModel):
     extracted_data: Optional[Dict] = Field(default=None, description="Extracted structured data if relevant, null otherwise")
 
 
+@lru_cache(maxsize=None)
+def _batch_extraction_model(item_model: Type[BaseModel]) -> Type[BaseModel]:
+    """Wrap an extraction schema as a list of items tagged with their document index"""
+    indexed_item = create_model(
+        f"Indexed{item_model.__name__}",
+        __base__=item_model,
+        doc_index=(int, Field(description="Index of the document (1-based)"))
+    )
+    return create_model(
+        f"Batch{item_model.__name__}",
+        items=(List[indexed_item], Field(description="One entry per document"))
+    )
+
+
+# --- Response Cache ---
+# Exact-match cache of successful LLM results, shared by every LLMInterface
+# instance in the process. Re-scanning the same emails or re-asking about the
+# same documents then skips the round-trip.
+
+RESPONSE_CACHE_TTL = 3600  # seconds
+RESPONSE_CACHE_MAX = 1024
+
+_response_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+
+def _json_dumps(obj, sort_keys: bool = False, indent: bool = False) -> str:
+    """JSON-encode with orjson when available (non-serializable values via str)"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=str, option=option).decode("utf-8")
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; stdlib json handles them
+    return json.dumps(obj, sort_keys=sort_keys, indent=2 if indent else None, default=str)
+
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _cache_key(*parts) -> str:
+    payload = _json_dumps(parts, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[Dict]:
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > RESPONSE_CACHE_TTL:
+            del _response_cache[key]
+            return None
+        _response_cache.move_to_end(key)
+    return copy.deepcopy(result)
+
+
+def _cache_put(key: str, result: Dict):
+    with _response_cache_lock:
+        _response_cache[key] = (time.monotonic(), copy.deepcopy(result))
+        if len(_response_cache) > RESPONSE_CACHE_MAX:
+            _response_cache.popitem(last=False)
+
+
 class LLMInterface:
     
     def __init__(self, api_key: str, model: str = "", temperature: float = 0.1):
@@ -95,11 +175,17 @@ class LLMInterface:
             "orders": OrderData, "receipts": OrderData, "shipping": OrderData,
             "general": GeneralData
         }
+        self._intent_chain = None
 
     def _get_model_for_type(self, extraction_type: str) -> Type[BaseModel]:
         return self.extraction_registry.get(extraction_type.lower(), GeneralData)
         
     def extract_data(self, text: str, extraction_type: str) -> Dict:
+        key = _cache_key("extract_data", self.model_name, self.temperature, extraction_type, text)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+        
         pydantic_model = self._get_model_for_type(extraction_type)
         parser = PydanticOutputParser(pydantic_object=pydantic_model)
         
@@ -112,12 +198,78 @@ class LLMInterface:
         
         try:
             result = chain.invoke({"text": text, "format_instructions": parser.get_format_instructions()})
-            return {"success": True, "extracted_data": result.dict(), "type": extraction_type}
+            response = {"success": True, "extracted_data": result.dict(), "type": extraction_type}
+            _cache_put(key, response)
+            return response
         except Exception as e:
             return {"success": False, "error": str(e), "extracted_data": {}}
     
+    def extract_data_batch(self, texts: List[str], extraction_type: str) -> List[Optional[Dict]]:
+        """
+        Extract structured data from several documents in a single LLM call.
+        
+        Args:
+            texts: Document texts, sent whole; the caller keeps the batch
+                within the prompt budget
+            extraction_type: Schema type, as for extract_data()
+        
+        Returns:
+            One extract_data()-shaped result per text, in input order. An entry
+            is None when the model skipped that document (or the call failed),
+            so the caller can fall back to extract_data() for it.
+        """
+        if not texts:
+            return []
+        
+        item_model = self._get_model_for_type(extraction_type)
+        parser = PydanticOutputParser(pydantic_object=_batch_extraction_model(item_model))
+        
+        docs_text = "".join(
+            f"\n---DOC {i}---\n{text}\n" for i, text in enumerate(texts, 1)
+        )
+        
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", f"Extract {extraction_type} data from each document separately."),
+            ("human", "{format_instructions}\n\nDocuments:\n{docs_text}\n\nReturn one entry for EACH of the {count} documents:")
+        ])
+        
+        chain = prompt | self.llm | parser
+        
+        try:
+            result = chain.invoke({
+                "docs_text": docs_text,
+                "count": len(texts),
+                "format_instructions": parser.get_format_instructions()
+            })
+        except Exception as e:
+            print(f"   ⚠️ Batch extraction failed: {e}")
+            return [None] * len(texts)
+        
+        results: List[Optional[Dict]] = [None] * len(texts)
+        for item in result.items:
+            if 1 <= item.doc_index <= len(texts):
+                data = item.dict()
+                data.pop("doc_index")
+                results[item.doc_index - 1] = {"success": True, "extracted_data": data, "type": extraction_type}
+        return results
+    
     def classify_intent(self, user_query: str) -> Dict:
         """CRITICAL: Distinguish scan_emails (fetch from Gmail) vs query_history (search DB)"""
+        if self._intent_chain is None:
+            self._intent_chain = self._build_intent_chain()
+        chain, format_instructions = self._intent_chain
+        
+        try:
+            result = chain.invoke({"query": user_query, "format_instructions": format_instructions})
+            entities = result.entities
+            if result.scan_type:
+                entities['email_scan_type'] = result.scan_type
+            return {"success": True, "intent": result.intent, "confidence": result.confidence, "entities": entities}
+        except Exception as e:
+            return {"success": False, "error": str(e), "intent": "unknown", "confidence": 0.0, "entities": {}}
+    
+    def _build_intent_chain(self):
+        """Build the classification chain and its format instructions once per instance"""
         parser = PydanticOutputParser(pydantic_object=IntentClassification)
         
         prompt = ChatPromptTemplate.from_messages([
@@ -136,21 +288,18 @@ For query_history, extract search keywords to entities"""),
             ("human", "{format_instructions}\n\nQuery: {query}\n\nClassify:")
         ])
         
-        chain = prompt | self.llm | parser
-        
-        try:
-            result = chain.invoke({"query": user_query, "format_instructions": parser.get_format_instructions()})
-            entities = result.entities
-            if result.scan_type:
-                entities['email_scan_type'] = result.scan_type
-            return {"success": True, "intent": result.intent, "confidence": result.confidence, "entities": entities}
-        except Exception as e:
-            return {"success": False, "error": str(e), "intent": "unknown", "confidence": 0.0, "entities": {}}
+        return prompt | self.llm | parser, parser.get_format_instructions()
     
     def generate_response(self, user_query: str, context: Dict, system_prompt: Optional[str] = None) -> Dict:
         if not system_prompt:
             system_prompt = "You are a helpful email assistant. Summarize emails clearly with sender, subject, date."
         
+        context_json = _json_dumps(context, indent=True)
+        key = _cache_key("generate_response", self.model_name, self.temperature, system_prompt, context_json, user_query)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+        
         prompt = ChatPromptTemplate.from_messages([
             ("system", system_prompt),
             ("human", "Context:\n{context}\n\nQuestion: {query}\n\nResponse:")
@@ -159,8 +308,10 @@ For query_history, extract search keywords to entities"""),
         chain = prompt | self.llm
         
         try:
-            result = chain.invoke({"context": json.dumps(context, indent=2, default=str), "query": user_query})
-            return {"success": True, "response": result.content}
+            result = chain.invoke({"context": context_json, "query": user_query})
+            response = {"success": True, "response": result.content}
+            _cache_put(key, response)
+            return response
         except Exception as e:
             return {"success": False, "error": str(e), "response": "Error generating response."}
             
@@ -314,7 +465,7 @@ Analyze and respond with JSON:""")
             import re
             json_match = re.search(r'\{[\s\S]*\}', content)
             if json_match:
-                parsed = json.loads(json_match.group())
+                parsed = _json_loads(json_match.group())
                 return {
                     "success": True,
                     "is_relevant": parsed.get("is_relevant", False),
@@ -376,4 +527,15 @@ Analyze and respond with JSON:""")
                     "email": email
                 })
 
-        return final_results
\ No newline at end of file
+        return final_results
+
+
+@lru_cache(maxsize=4)
+def get_llm_interface(api_key: str, model: str = "") -> LLMInterface:
+    """
+    Shared LLMInterface per (api_key, model).
+    
+    Reuses the underlying OpenAI client and its connection pool across calls;
+    a new key or model (e.g. after the user updates settings) gets a new instance.
+    """
+    return LLMInterface(api_key=api_key, model=model)
@@ -111,4 +111,16 @@ class PDFParser:
         except Exception as e:
             print(f"OCR extraction error: {e}")
         
-        return text
\ No newline at end of file
+        return text
+
+def parse_pdf_file(pdf_path: str, use_ocr: bool = False) -> Dict:
+    """
+    Parse a single PDF with a fresh PDFParser.
+
+    Module-level so it can be handed to a process pool worker.
+
+    Args:
+        pdf_path: Local path to the PDF file
+        use_ocr: Fall back to OCR when no text layer is found
+    """
+    return PDFParser().parse_pdf(pdf_path=pdf_path, use_ocr=use_ocr)
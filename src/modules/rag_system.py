@@ -1,12 +1,17 @@
 import voyageai
 import chromadb
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 
 class RAGSystem:
     """RAG system for semantic search over bills"""
     
+    # Distinct query texts whose embeddings are kept per instance
+    QUERY_EMBED_CACHE_SIZE = 256
+    
     def __init__(
         self,
         voyage_api_key: str,
@@ -23,6 +28,9 @@ class RAGSystem:
         """
         self.voyage_client = voyageai.Client(api_key=voyage_api_key)
         self.embedding_model = "voyage-2"
+        # query_database's fixed per-query_type strings and repeated searches
+        # reuse their vector instead of another Voyage round-trip
+        self.embed_query = lru_cache(maxsize=self.QUERY_EMBED_CACHE_SIZE)(self._embed_query)
         
         # Initialize ChromaDB
         self.chroma_client = chromadb.PersistentClient(path=chroma_path)
@@ -84,6 +92,74 @@ class RAGSystem:
                 "error": str(e)
             }
     
+    # Voyage accepts at most this many texts per embed request
+    EMBED_BATCH_SIZE = 128
+    # Embed requests in flight at once for large batches
+    EMBED_CONCURRENCY = 4
+    
+    def add_documents(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        doc_ids: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        Add several documents with batched embedding and one vector store write
+        
+        Args:
+            texts: Document text contents
+            metadatas: Metadata for each document, in the same order
+            doc_ids: Optional document IDs (generated when omitted)
+            
+        Returns:
+            Dict with result and the list of document_ids
+        """
+        if not texts:
+            return {"success": True, "document_ids": [], "message": "No documents to add"}
+        
+        try:
+            if not doc_ids:
+                doc_ids = [str(uuid.uuid4()) for _ in texts]
+            
+            chunks = [
+                texts[start:start + self.EMBED_BATCH_SIZE]
+                for start in range(0, len(texts), self.EMBED_BATCH_SIZE)
+            ]
+            embed = lambda chunk: self.voyage_client.embed(texts=chunk, model=self.embedding_model).embeddings
+            if len(chunks) == 1:
+                chunk_embeddings = [embed(chunks[0])]
+            else:
+                # Overlap the embedding round-trips; Chroma gets one insert either way
+                with ThreadPoolExecutor(max_workers=min(self.EMBED_CONCURRENCY, len(chunks))) as pool:
+                    chunk_embeddings = list(pool.map(embed, chunks))
+            embeddings = [vector for chunk in chunk_embeddings for vector in chunk]
+            
+            self.collection.add(
+                ids=doc_ids,
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=metadatas
+            )
+            
+            return {
+                "success": True,
+                "document_ids": doc_ids,
+                "message": f"{len(doc_ids)} documents added successfully"
+            }
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def _embed_query(self, query: str) -> List[float]:
+        """Embedding vector for a query string (use embed_query, which memoizes it)"""
+        return self.voyage_client.embed(
+            texts=[query],
+            model=self.embedding_model
+        ).embeddings[0]
+    
     def search(
         self,
         query: str,
@@ -102,11 +178,7 @@ class RAGSystem:
             Dict with search results and relevance scores
         """
         try:
-            # Generate query embedding
-            query_embedding = self.voyage_client.embed(
-                texts=[query],
-                model=self.embedding_model
-            ).embeddings[0]
+            query_embedding = self.embed_query(query)
             
             # Build where clause for filtering
             where = None
@@ -242,4 +314,15 @@ class RAGSystem:
             return {
                 "success": False,
                 "error": str(e)
-            }
\ No newline at end of file
+            }
+
+
+@lru_cache(maxsize=4)
+def get_rag_system(voyage_api_key: str, chroma_path: str = "./data/vector_store/") -> RAGSystem:
+    """
+    Shared RAGSystem per (api_key, store path).
+    
+    Opening the Chroma store and the Voyage client once per process saves the
+    setup cost on every tool call; a changed key or path gets a new instance.
+    """
+    return RAGSystem(voyage_api_key, chroma_path)
@@ -12,6 +12,9 @@ logger = logging.getLogger(__name__)
 class ReminderSystem:
     """Send bill reminder notifications via Email, Telegram, or WhatsApp"""
 
+    # Shared by all instances so Telegram/Twilio calls reuse pooled HTTPS connections
+    _http = requests.Session()
+
     def __init__(
         self,
         email_address: str = "",
@@ -365,7 +368,7 @@ Bill Tracker Agent
 _Bill Tracker Agent_"""
 
             url = f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage"
-            response = requests.post(url, json={
+            response = self._http.post(url, json={
                 "chat_id": target_chat_id,
                 "text": message,
                 "parse_mode": "Markdown"
@@ -476,7 +479,7 @@ _Bill Tracker Agent_"""
             from_num = self.twilio_from_number if self.twilio_from_number.startswith("whatsapp:") else f"whatsapp:{self.twilio_from_number}"
             to_num = target_number if target_number.startswith("whatsapp:") else f"whatsapp:{target_number}"
 
-            response = requests.post(
+            response = self._http.post(
                 url,
                 auth=(self.twilio_account_sid, self.twilio_auth_token),
                 data={
@@ -614,7 +617,7 @@ _Bill Tracker Agent_"""
             if len(message) > MAX_LENGTH:
                 message = message[:MAX_LENGTH - 50] + "\n\n... (truncated)"
 
-            response = requests.post(
+            response = self._http.post(
                 url,
                 auth=(self.twilio_account_sid, self.twilio_auth_token),
                 data={
@@ -694,7 +697,7 @@ _Bill Tracker Agent_"""
                 message = message[:3950] + "\n\n... (message truncated)"
 
             url = f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage"
-            response = requests.post(url, json={
+            response = self._http.post(url, json={
                 "chat_id": target_chat_id,
                 "text": message,
                 "parse_mode": "Markdown"